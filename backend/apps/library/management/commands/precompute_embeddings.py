@@ -5,18 +5,165 @@ This significantly speeds up pronunciation assessment by caching
 phoneme-level embeddings for reference audio.
 """
 
+import hashlib
+import json
 import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import torch
+from tqdm import tqdm
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from django.db import transaction
 from apps.library.models import ReferenceSentence
-from nlp_core.vectorizer import batch_audio_to_embeddings
+from nlp_core.vectorizer import batch_audio_to_embeddings, pack_embeddings
 from nlp_core.audio_slicer import slice_audio_by_timestamps
-from nlp_core.aligner import get_phoneme_timestamps_with_text
-import pickle
-import os
+from nlp_core.aligner import (
+    get_phoneme_timestamps_with_text,
+    get_phoneme_timestamps_batch,
+    load_audio,
+    normalize_transcript
+)
 
 logger = logging.getLogger(__name__)
 
+# Default number of sentences aligned per batched model forward pass
+BATCH_SIZE = 16
+
+# Computed sentences written per bulk UPDATE transaction
+SAVE_CHUNK_SIZE = 100
+
+# Rows fetched per database round-trip while streaming sentences
+FETCH_CHUNK_SIZE = 200
+
+# Columns needed to compute embeddings. The embeddings BLOB itself is
+# never loaded: it is either NULL (filtered) or about to be overwritten.
+SENTENCE_FIELDS = ('id', 'text', 'audio_file', 'phoneme_sequence')
+
+# On-disk cache of alignment + slicing results, reused across reruns.
+# Bump the version when alignment or slicing output changes.
+ALIGNMENT_CACHE_DIR = os.path.join(settings.BASE_DIR, '.cache', 'alignments')
+# v3: entries from the broken batched forward held uniform timestamps.
+ALIGNMENT_CACHE_VERSION = 3
+
+
+def _alignment_cache_path(audio_path, text, phoneme_sequence):
+    """Cache file for an (audio file version, transcript, phonemes) triple."""
+    key = hashlib.sha1(
+        f'{ALIGNMENT_CACHE_VERSION}:{audio_path}:{os.path.getmtime(audio_path)}:'
+        f'{text}:{json.dumps(phoneme_sequence)}'.encode()
+    ).hexdigest()
+    return os.path.join(ALIGNMENT_CACHE_DIR, f'{key}.npz')
+
+
+def _load_cached_slices(cache_path):
+    """Return cached audio slices, or None on a cache miss."""
+    if not os.path.exists(cache_path):
+        return None
+
+    try:
+        with np.load(cache_path) as cached:
+            samples = cached['samples']
+            offsets = cached['offsets']
+    except Exception:
+        logger.warning(f'Ignoring unreadable alignment cache {cache_path}')
+        return None
+
+    return [samples[start:end] for start, end in zip(offsets[:-1], offsets[1:])]
+
+
+def _save_cached_slices(cache_path, phoneme_timestamps, audio_slices):
+    """Store phoneme timestamps and audio slices for later reruns."""
+    try:
+        os.makedirs(ALIGNMENT_CACHE_DIR, exist_ok=True)
+        offsets = np.concatenate(([0], np.cumsum([len(s) for s in audio_slices])))
+
+        # Write then rename so concurrent workers never read a partial file
+        tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f,
+                phonemes=np.array([ts['phoneme'] for ts in phoneme_timestamps]),
+                starts=np.array([ts['start'] for ts in phoneme_timestamps]),
+                ends=np.array([ts['end'] for ts in phoneme_timestamps]),
+                samples=np.concatenate(audio_slices).astype(np.float32),
+                offsets=offsets
+            )
+        os.replace(tmp_path, cache_path)
+    except Exception:
+        logger.warning(f'Failed to write alignment cache {cache_path}', exc_info=True)
+
+
+def _align_and_slice(audio_path, text, clean_transcript, phoneme_sequence,
+                     cache_path, waveform, sample_rate, phoneme_timestamps=None):
+    """
+    Align one sentence (unless timestamps are given), slice and cache it.
+
+    Shared by the worker-process and batched paths so both produce and
+    cache the same slices.
+
+    Returns:
+        Tuple of (audio slices or None, error message or None)
+    """
+    if phoneme_timestamps is None:
+        phoneme_timestamps = get_phoneme_timestamps_with_text(
+            audio_path,
+            text,
+            expected_phonemes=phoneme_sequence,
+            transcript_clean=clean_transcript,
+            waveform=waveform,
+            sample_rate=sample_rate
+        )
+    if not phoneme_timestamps:
+        return None, 'Failed to get phoneme timestamps'
+
+    audio_slices = slice_audio_by_timestamps(
+        waveform, phoneme_timestamps, sample_rate
+    )
+    if not audio_slices:
+        return None, 'Failed to slice audio'
+
+    _save_cached_slices(cache_path, phoneme_timestamps, audio_slices)
+    return audio_slices, None
+
+
+def _prepare_slices(item):
+    """
+    Align one sentence's reference audio and slice it into phonemes.
+
+    Runs inside a worker process, so it is a top-level function working
+    on plain values. Workers never touch the database: closing a forked
+    copy of the parent's connection would terminate the parent's session.
+
+    Args:
+        item: Tuple of (sentence_id, audio_path, text, clean_transcript,
+            phoneme_sequence)
+
+    Returns:
+        Tuple of (sentence_id, audio slices or None, error message or None)
+    """
+    sentence_id, audio_path, text, clean_transcript, phoneme_sequence = item
+
+    try:
+        cache_path = _alignment_cache_path(audio_path, text, phoneme_sequence)
+        audio_slices = _load_cached_slices(cache_path)
+        if audio_slices is not None:
+            return sentence_id, audio_slices, None
+
+        # Decode once; alignment and slicing share the waveform
+        waveform, sample_rate = load_audio(audio_path)
+
+        audio_slices, error = _align_and_slice(
+            audio_path, text, clean_transcript, phoneme_sequence,
+            cache_path, waveform, sample_rate
+        )
+        return sentence_id, audio_slices, error
+
+    except Exception as e:
+        logger.exception(f'Failed to prepare sentence {sentence_id}')
+        return sentence_id, None, str(e)
+
 
 class Command(BaseCommand):
     help = 'Precompute reference embeddings for all sentences in the library'
@@ -32,10 +179,24 @@ class Command(BaseCommand):
             type=int,
             help='Precompute only for specific sentence ID',
         )
+        parser.add_argument(
+            '--jobs',
+            type=int,
+            default=1,
+            help='Worker processes for alignment on CPU (ignored on GPU)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help=f'Sentences per alignment/embedding batch (default {BATCH_SIZE})',
+        )
 
     def handle(self, *args, **options):
         force = options['force']
         sentence_id = options.get('sentence_id')
+        jobs = max(1, options['jobs'])
+        batch_size = max(1, options['batch_size'])
 
         # Get sentences to process
         if sentence_id:
@@ -48,103 +209,78 @@ class Command(BaseCommand):
         else:
             sentences = ReferenceSentence.objects.all()
 
-        total = sentences.count()
-        self.stdout.write(self.style.SUCCESS(
-            f'Found {total} sentence(s) to process'
-        ))
+        # Skip sentences with cached embeddings in SQL rather than per row
+        skipped = 0
+        if not force:
+            skipped = sentences.filter(reference_embeddings__isnull=False).count()
+            sentences = sentences.filter(reference_embeddings__isnull=True)
+            if skipped:
+                self.stdout.write(self.style.WARNING(
+                    f'Skipping {skipped} sentence(s) with embeddings already cached'
+                ))
+
+        sentences = sentences.only(*SENTENCE_FIELDS)
 
         processed = 0
-        skipped = 0
         failed = 0
+        batch = []
+        to_save = []
 
-        for sentence in sentences:
-            # Skip if embeddings already exist and not forcing
-            if sentence.reference_embeddings and not force:
+        # GPU: align each batch in one model forward. CPU with --jobs > 1:
+        # spread alignment and slicing of single sentences over worker
+        # processes, splitting the cores between them so their torch
+        # thread pools do not oversubscribe the CPU.
+        executor = None
+        if torch.cuda.is_available():
+            if jobs > 1:
                 self.stdout.write(self.style.WARNING(
-                    f'[{sentence.id}] Skipping "{sentence.text[:30]}..." '
-                    f'(embeddings already cached)'
+                    '--jobs is ignored on GPU; batches run in one process'
                 ))
-                skipped += 1
-                continue
-
-            self.stdout.write(
-                f'[{sentence.id}] Processing: "{sentence.text[:50]}..."'
+        elif jobs > 1:
+            threads = max(1, (os.cpu_count() or 1) // jobs)
+            executor = ProcessPoolExecutor(
+                max_workers=jobs,
+                initializer=torch.set_num_threads,
+                initargs=(threads,)
             )
+            # Give every worker at least one sentence per batch
+            batch_size = max(batch_size, jobs)
 
-            try:
-                # Step 1: Check if reference audio exists
+        try:
+            for sentence in sentences.iterator(chunk_size=FETCH_CHUNK_SIZE):
+                # Check if reference audio exists
                 if not sentence.audio_file or not os.path.exists(sentence.audio_file.path):
                     self.stdout.write(self.style.ERROR(
-                        f'  ✗ No reference audio file found'
-                    ))
-                    failed += 1
-                    continue
-
-                audio_path = sentence.audio_file.path
-                self.stdout.write(f'  → Audio: {os.path.basename(audio_path)}')
-
-                # Step 2: Get phoneme timestamps using forced alignment
-                self.stdout.write('  → Running forced alignment...')
-                phoneme_timestamps = get_phoneme_timestamps_with_text(
-                    audio_path,
-                    sentence.text,
-                    expected_phonemes=sentence.phoneme_sequence
-                )
-
-                if not phoneme_timestamps:
-                    self.stdout.write(self.style.ERROR(
-                        '  ✗ Failed to get phoneme timestamps'
+                        f'[{sentence.id}] ✗ No reference audio file found'
                     ))
                     failed += 1
                     continue
 
-                self.stdout.write(f'  → Found {len(phoneme_timestamps)} phonemes')
+                sentence.clean_transcript = normalize_transcript(sentence.text)
+                batch.append(sentence)
+                if len(batch) >= batch_size:
+                    computed, batch_failed = self._process_batch(batch, executor, jobs)
+                    to_save.extend(computed)
+                    failed += batch_failed
+                    batch = []
 
-                # Step 3: Slice audio into phoneme segments
-                self.stdout.write('  → Slicing audio...')
-                audio_slices = slice_audio_by_timestamps(
-                    audio_path,
-                    phoneme_timestamps
-                )
+                if len(to_save) >= SAVE_CHUNK_SIZE:
+                    processed += self._save(to_save)
+                    to_save = []
 
-                if not audio_slices:
-                    self.stdout.write(self.style.ERROR(
-                        '  ✗ Failed to slice audio'
-                    ))
-                    failed += 1
-                    continue
-
-                # Step 4: Generate embeddings for each slice
-                self.stdout.write('  → Generating embeddings...')
-                embeddings = batch_audio_to_embeddings(audio_slices)
+            if batch:
+                computed, batch_failed = self._process_batch(batch, executor, jobs)
+                to_save.extend(computed)
+                failed += batch_failed
 
-                if not embeddings:
-                    self.stdout.write(self.style.ERROR(
-                        '  ✗ Failed to generate embeddings'
-                    ))
-                    failed += 1
-                    continue
-
-                # Step 5: Serialize and save to database
-                self.stdout.write('  → Saving to database...')
-                with transaction.atomic():
-                    sentence.reference_embeddings = pickle.dumps(embeddings)
-                    sentence.save(update_fields=['reference_embeddings'])
-
-                self.stdout.write(self.style.SUCCESS(
-                    f'  ✓ Successfully cached {len(embeddings)} embeddings'
-                ))
-                processed += 1
-
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(
-                    f'  ✗ Error: {str(e)}'
-                ))
-                logger.exception(f'Failed to process sentence {sentence.id}')
-                failed += 1
-                continue
+            if to_save:
+                processed += self._save(to_save)
+        finally:
+            if executor is not None:
+                executor.shutdown()
 
         # Summary
+        total = processed + failed
         self.stdout.write('\n' + '='*60)
         self.stdout.write(self.style.SUCCESS(
             f'✓ Processed: {processed}/{total}'
@@ -164,3 +300,209 @@ class Command(BaseCommand):
                 '\nEmbeddings successfully precomputed! '
                 'Assessment speed should now be much faster.'
             ))
+
+    def _process_batch(self, batch, executor=None, jobs=1):
+        """
+        Align, slice and embed a batch of sentences.
+
+        Slices of every successfully prepared sentence are embedded in a
+        single call. Saving is left to the caller so several batches can
+        share one transaction.
+
+        Returns:
+            Tuple of (sentences with new embeddings, failed count)
+        """
+        if executor is not None:
+            prepared = self._prepare_in_pool(batch, executor, jobs)
+        else:
+            prepared = self._prepare_batched(batch)
+
+        failed = len(batch) - len(prepared)
+        if not prepared:
+            return [], failed
+
+        # Step 3: Generate embeddings for all slices of the batch at once
+        self.stdout.write(f'→ Generating embeddings for {len(prepared)} sentence(s)...')
+        all_slices = [s for _, audio_slices in prepared for s in audio_slices]
+        try:
+            all_embeddings = batch_audio_to_embeddings(all_slices)
+        except Exception as e:
+            self.stdout.write(self.style.ERROR(f'  ✗ Error: {str(e)}'))
+            logger.exception('Failed to generate embeddings for batch')
+            return [], len(batch)
+
+        # Step 4: Serialize each sentence's share of the embeddings
+        to_update = []
+        offset = 0
+        for sentence, audio_slices in prepared:
+            embeddings = all_embeddings[offset:offset + len(audio_slices)]
+            offset += len(audio_slices)
+
+            if not embeddings:
+                self.stdout.write(self.style.ERROR(
+                    f'[{sentence.id}] ✗ Failed to generate embeddings'
+                ))
+                failed += 1
+                continue
+
+            sentence.reference_embeddings = pack_embeddings(embeddings)
+            to_update.append(sentence)
+            self.stdout.write(self.style.SUCCESS(
+                f'[{sentence.id}] ✓ Computed {len(embeddings)} embeddings'
+            ))
+
+        return to_update, failed
+
+    def _save(self, sentences):
+        """
+        Write computed embeddings back in a single transaction.
+
+        Returns:
+            Number of sentences saved
+        """
+        self.stdout.write(f'→ Saving {len(sentences)} sentence(s) to database...')
+        with transaction.atomic():
+            ReferenceSentence.objects.bulk_update(
+                sentences, ['reference_embeddings', 'clean_transcript']
+            )
+        return len(sentences)
+
+    def _prepare_in_pool(self, batch, executor, jobs):
+        """
+        Align and slice sentences in worker processes.
+
+        Returns:
+            List of (sentence, audio slices) for sentences that succeeded
+        """
+        by_id = {sentence.id: sentence for sentence in batch}
+        items = [
+            (s.id, s.audio_file.path, s.text, s.clean_transcript, s.phoneme_sequence)
+            for s in batch
+        ]
+        # One chunk per worker so every process gets a share of the batch
+        results = executor.map(
+            _prepare_slices, items, chunksize=max(1, len(items) // jobs)
+        )
+
+        prepared = []
+        for sentence_id, audio_slices, error in tqdm(
+            results, total=len(batch), desc='Aligning', leave=False
+        ):
+            sentence = by_id[sentence_id]
+            if error:
+                self.stdout.write(self.style.ERROR(
+                    f'[{sentence_id}] ✗ {error}'
+                ))
+                continue
+
+            self.stdout.write(
+                f'[{sentence_id}] Prepared {len(audio_slices)} phoneme slices: '
+                f'"{sentence.text[:50]}..."'
+            )
+            prepared.append((sentence, audio_slices))
+
+        return prepared
+
+    def _prepare_batched(self, batch):
+        """
+        Align a batch in one model forward, then slice each sentence.
+
+        Sentences found in the alignment cache skip both steps. If the
+        batched call fails, every sentence falls back to single-item
+        alignment.
+
+        Returns:
+            List of (sentence, audio slices) for sentences that succeeded
+        """
+        prepared = []
+        uncached = []
+
+        for sentence in batch:
+            cache_path = _alignment_cache_path(
+                sentence.audio_file.path, sentence.text, sentence.phoneme_sequence
+            )
+            audio_slices = _load_cached_slices(cache_path)
+            if audio_slices is not None:
+                self.stdout.write(
+                    f'[{sentence.id}] Using cached alignment for '
+                    f'"{sentence.text[:50]}..."'
+                )
+                prepared.append((sentence, audio_slices))
+            else:
+                uncached.append((sentence, cache_path))
+
+        if not uncached:
+            return prepared
+
+        # Decode each file once; alignment and slicing share the waveform
+        loaded = []
+        for sentence, cache_path in uncached:
+            try:
+                waveform, sample_rate = load_audio(sentence.audio_file.path)
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(
+                    f'[{sentence.id}] ✗ Failed to load audio: {str(e)}'
+                ))
+                continue
+            loaded.append((sentence, cache_path, waveform))
+
+        if not loaded:
+            return prepared
+
+        batch = [sentence for sentence, _, _ in loaded]
+        audio_paths = [sentence.audio_file.path for sentence in batch]
+        waveforms = [waveform for _, _, waveform in loaded]
+
+        # Step 1: Get phoneme timestamps using batched forced alignment
+        self.stdout.write(
+            f'→ Running forced alignment for {len(batch)} sentence(s)...'
+        )
+        try:
+            batch_timestamps = get_phoneme_timestamps_batch(
+                audio_paths,
+                [sentence.text for sentence in batch],
+                [sentence.phoneme_sequence for sentence in batch],
+                transcripts_clean=[sentence.clean_transcript for sentence in batch],
+                waveforms=waveforms,
+                sample_rate=sample_rate
+            )
+        except Exception:
+            logger.exception('Batched alignment failed, aligning one by one')
+            batch_timestamps = [None] * len(batch)
+
+        for (sentence, cache_path, waveform), audio_path, phoneme_timestamps in zip(
+            loaded, audio_paths, batch_timestamps
+        ):
+            self.stdout.write(
+                f'[{sentence.id}] Processing: "{sentence.text[:50]}..."'
+            )
+            self.stdout.write(f'  → Audio: {os.path.basename(audio_path)}')
+
+            try:
+                if phoneme_timestamps is None:
+                    self.stdout.write('  → Running forced alignment...')
+                audio_slices, error = _align_and_slice(
+                    audio_path,
+                    sentence.text,
+                    sentence.clean_transcript,
+                    sentence.phoneme_sequence,
+                    cache_path,
+                    waveform,
+                    sample_rate,
+                    phoneme_timestamps=phoneme_timestamps
+                )
+                if error:
+                    self.stdout.write(self.style.ERROR(f'  ✗ {error}'))
+                    continue
+
+                self.stdout.write(f'  → Sliced {len(audio_slices)} phonemes')
+                prepared.append((sentence, audio_slices))
+
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(
+                    f'  ✗ Error: {str(e)}'
+                ))
+                logger.exception(f'Failed to process sentence {sentence.id}')
+                continue
+
+        return prepared
@@ -0,0 +1,41 @@
+# Generated by Django 6.0.1 on 2026-10-15 09:00
+
+from django.db import migrations, models
+
+
+def populate_clean_transcript(apps, schema_editor):
+    """Store the alignment-ready transcript for existing sentences."""
+    ReferenceSentence = apps.get_model("library", "ReferenceSentence")
+
+    sentences = []
+    for sentence in ReferenceSentence.objects.only("id", "text").iterator():
+        sentence.clean_transcript = "".join(
+            c for c in sentence.text.lower() if c.isalpha()
+        )
+        sentences.append(sentence)
+
+    ReferenceSentence.objects.bulk_update(
+        sentences, ["clean_transcript"], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("library", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="referencesentence",
+            name="clean_transcript",
+            field=models.TextField(
+                blank=True,
+                default="",
+                help_text="Normalized transcript used for forced alignment",
+            ),
+        ),
+        migrations.RunPython(
+            populate_clean_transcript, migrations.RunPython.noop
+        ),
+    ]
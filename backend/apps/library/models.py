@@ -6,6 +6,8 @@ Contains static content: phonemes and reference sentences with precomputed data.
 
 from django.db import models
 
+from nlp_core.text_normalize import normalize_transcript
+
 
 class Phoneme(models.Model):
     """
@@ -68,6 +70,13 @@ class ReferenceSentence(models.Model):
     
     text = models.TextField()
     
+    # Alignment-ready transcript (lowercase letters only, no spaces)
+    clean_transcript = models.TextField(
+        blank=True,
+        default='',
+        help_text='Normalized transcript used for forced alignment'
+    )
+    
     # Audio storage (local file or Supabase URL)
     audio_file = models.FileField(upload_to='references/', blank=True, null=True)
     audio_url = models.URLField(blank=True, help_text='Supabase storage URL')
@@ -128,7 +137,15 @@ class ReferenceSentence(models.Model):
     
     def __str__(self):
         return f"{self.text[:50]}..." if len(self.text) > 50 else self.text
-    
+
+    def save(self, *args, **kwargs):
+        """Keep clean_transcript in sync with text on every save."""
+        self.clean_transcript = normalize_transcript(self.text)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'clean_transcript' not in update_fields:
+            kwargs['update_fields'] = list(update_fields) + ['clean_transcript']
+        super().save(*args, **kwargs)
+
     def get_audio_source(self):
         """Return the audio URL or absolute file path."""
         if self.audio_url:
@@ -151,7 +151,8 @@ class AssessmentService:
             user_timestamps = self._align_audio(
                 cleaned_audio_path, 
                 expected_phonemes,
-                sentence_text=sentence.text
+                sentence_text=sentence.text,
+                transcript_clean=sentence.clean_transcript or None
             )
             
             # Step 5: CONTEXTUAL EMBEDDINGS (tensor slicing, not audio slicing!)
@@ -265,7 +266,7 @@ class AssessmentService:
         from nlp_core.audio_cleaner import clean_audio
         return clean_audio(audio_file)
     
-    def _align_audio(self, audio_path, phonemes, sentence_text=None):
+    def _align_audio(self, audio_path, phonemes, sentence_text=None, transcript_clean=None):
         """
         Run forced alignment on audio.
         
@@ -275,7 +276,10 @@ class AssessmentService:
         
         if sentence_text:
             # Use word-level alignment + G2P for better accuracy
-            return get_phoneme_timestamps_with_text(audio_path, sentence_text, phonemes)
+            return get_phoneme_timestamps_with_text(
+                audio_path, sentence_text, phonemes,
+                transcript_clean=transcript_clean
+            )
         else:
             # Fallback to phoneme-only alignment
             return get_phoneme_timestamps(audio_path, phonemes)
@@ -292,20 +296,18 @@ class AssessmentService:
     
     def _get_reference_embeddings(self, sentence):
         """Fetch precomputed reference embeddings from database."""
-        import pickle
         import os
         import numpy as np
+        from nlp_core.vectorizer import pack_embeddings, unpack_embeddings
         
         # Try loading cached embeddings
         if sentence.reference_embeddings:
             try:
-                embeddings = pickle.loads(sentence.reference_embeddings)
+                embeddings = unpack_embeddings(sentence.reference_embeddings)
                 # Validate embeddings are usable
-                if embeddings and len(embeddings) > 0:
-                    # Ensure they're numpy arrays
-                    if hasattr(embeddings[0], 'numpy'):
-                        embeddings = [e.numpy() if hasattr(e, 'numpy') else e for e in embeddings]
-                    return embeddings
+                if len(embeddings) > 0:
+                    # Stored as float16; score in float32 so norms can't overflow
+                    return embeddings.astype(np.float32)
             except Exception as e:
                 logger.warning(f"Failed to load cached embeddings for sentence {sentence.id}: {e}")
                 # Clear invalid cache
@@ -332,7 +334,7 @@ class AssessmentService:
                 embedding = embedding.numpy()
             
             # Cache in database for future use (as numpy, not torch)
-            sentence.reference_embeddings = pickle.dumps([embedding])
+            sentence.reference_embeddings = pack_embeddings([embedding])
             sentence.save(update_fields=['reference_embeddings'])
             
             return [embedding]
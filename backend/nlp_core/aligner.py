@@ -17,8 +17,10 @@ from nlp_core.alignment import (
     get_word_timestamps,
     get_phoneme_timestamps,
     get_phoneme_timestamps_with_text,
+    get_phoneme_timestamps_batch,
     load_audio,
     strip_stress,
+    normalize_transcript,
 )
 
 # Additional convenience imports
@@ -30,7 +32,9 @@ __all__ = [
     'get_word_timestamps',
     'get_phoneme_timestamps',
     'get_phoneme_timestamps_with_text',
+    'get_phoneme_timestamps_batch',
     'load_audio',
     'strip_stress',
+    'normalize_transcript',
     'align_audio',
 ]
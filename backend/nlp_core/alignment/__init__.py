@@ -12,20 +12,44 @@ Modules:
 """
 
 from .models import get_forced_alignment_model
-from .ctc_aligner import perform_ctc_forced_alignment
-from .word_aligner import get_word_timestamps
+from .ctc_aligner import (
+    perform_ctc_forced_alignment,
+    perform_ctc_forced_alignment_arrays,
+    perform_ctc_forced_alignment_batch,
+    perform_ctc_forced_alignment_batch_arrays
+)
+from .word_aligner import get_word_timestamps, get_word_timestamps_batch
 from .phoneme_aligner import (
     get_phoneme_timestamps,
-    get_phoneme_timestamps_with_text
+    get_phoneme_timestamps_with_text,
+    get_phoneme_timestamps_batch
+)
+from .utils import (
+    AlignedPhonemes,
+    AlignedToken,
+    AlignedTokenArrays,
+    get_audio_duration,
+    load_audio,
+    strip_stress,
+    normalize_transcript
 )
-from .utils import load_audio, strip_stress
 
 __all__ = [
     'get_forced_alignment_model',
     'perform_ctc_forced_alignment',
+    'perform_ctc_forced_alignment_arrays',
+    'perform_ctc_forced_alignment_batch',
+    'perform_ctc_forced_alignment_batch_arrays',
     'get_word_timestamps',
+    'get_word_timestamps_batch',
     'get_phoneme_timestamps',
     'get_phoneme_timestamps_with_text',
+    'get_phoneme_timestamps_batch',
+    'AlignedPhonemes',
+    'AlignedToken',
+    'AlignedTokenArrays',
+    'get_audio_duration',
     'load_audio',
     'strip_stress',
+    'normalize_transcript',
 ]
@@ -0,0 +1,20 @@
+"""
+Numeric Kernels for Alignment.
+
+Small array kernels shared by the aligners.
+"""
+
+import numpy as np
+
+
+def alloc_times(weights, total_start, total_duration):
+    """
+    Split [total_start, total_start + total_duration] proportionally to
+    the float64 weights array.
+    
+    Returns:
+        Tuple of (starts, ends) arrays, one entry per weight
+    """
+    ends = total_start + np.cumsum(weights * (total_duration / weights.sum()))
+    starts = np.concatenate(([total_start], ends[:-1]))
+    return starts, ends
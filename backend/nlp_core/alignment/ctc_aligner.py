@@ -5,44 +5,124 @@ Core CTC alignment logic for character-level timestamp extraction.
 """
 
 import logging
-from typing import List
+import os
+from typing import List, Optional, Tuple, Union
+import numpy as np
 import torch
 import torchaudio
+from torch.nn.utils.rnn import pad_sequence
 
-from .models import get_forced_alignment_model
-from .utils import AlignedToken
+from .models import (
+    get_forced_alignment_model,
+    get_alignment_device,
+    alignment_autocast
+)
+from .utils import (
+    AlignedToken,
+    AlignedTokenArrays,
+    CharSegments,
+    get_audio_duration,
+    get_resampler,
+    load_audio,
+    normalize_transcript
+)
 
 logger = logging.getLogger(__name__)
 
+# Window length when streaming an audio file through the MMS_FA model
+STREAM_CHUNK_SECONDS = 30
+
+# Shortest input the wav2vec2 conv front-end can turn into a frame
+MIN_MODEL_SAMPLES = 400
+
+# Attributes of torchaudio's MMS_FA model wrapper the batched path relies on
+_MMS_WRAPPER_ATTRS = ('model', 'normalize_waveform', 'apply_log_softmax', 'append_star')
+
+# ASCII code -> MMS_FA token index (-1 = not in dictionary), built on first use
+_mms_lut = None
+
+
+def _get_mms_lut(char_to_idx: dict) -> np.ndarray:
+    """Build (once) the ASCII lookup table for the MMS_FA dictionary."""
+    global _mms_lut
+    
+    if _mms_lut is None:
+        lut = np.full(128, -1, dtype=np.int32)
+        for char, idx in char_to_idx.items():
+            if len(char) == 1 and ord(char) < 128:
+                lut[ord(char)] = idx
+        _mms_lut = lut
+    
+    return _mms_lut
+
 
 def perform_ctc_forced_alignment(
-    waveform: torch.Tensor,
+    waveform: Union[torch.Tensor, str, os.PathLike],
     transcript: str,
-    sample_rate: int = 16000
+    sample_rate: int = 16000,
+    transcript_clean: Optional[str] = None
 ) -> List[AlignedToken]:
     """
     Perform CTC-based forced alignment between audio and text.
     
+    See perform_ctc_forced_alignment_arrays for details.
+    
+    Returns:
+        List of AlignedToken with character-level timestamps
+    """
+    return perform_ctc_forced_alignment_arrays(
+        waveform, transcript, sample_rate, transcript_clean=transcript_clean
+    ).to_tokens()
+
+
+def perform_ctc_forced_alignment_arrays(
+    waveform: Union[torch.Tensor, str, os.PathLike],
+    transcript: str,
+    sample_rate: int = 16000,
+    transcript_clean: Optional[str] = None
+) -> AlignedTokenArrays:
+    """
+    Perform CTC-based forced alignment, returning parallel arrays.
+    
+    Same as perform_ctc_forced_alignment without building one Python
+    object per character, for callers that consume the timestamps as
+    arrays.
+    
     Uses emission probabilities from the model and dynamic time
     warping to find the optimal alignment path.
     
+    When given a file path, MMS_FA streams the audio through the model
+    in STREAM_CHUNK_SECONDS windows, so memory use does not grow with the
+    audio length. Only the (small) emission matrix is kept in full.
+    
     Args:
-        waveform: Audio waveform tensor
+        waveform: Audio waveform tensor, or path to an audio file
         transcript: Text transcript to align
         sample_rate: Audio sample rate
+        transcript_clean: Precomputed normalize_transcript(transcript), if known
     
     Returns:
-        List of AlignedToken with character-level timestamps
+        AlignedTokenArrays of (tokens, starts, ends, scores)
     """
     bundle, model, tokenizer = get_forced_alignment_model()
     
     # Normalize transcript
     transcript = transcript.upper().strip()
     
-    with torch.no_grad():
+    if isinstance(waveform, (str, os.PathLike)):
+        if bundle is not None:
+            with torch.inference_mode():
+                return _mms_streamed_alignment(
+                    waveform, transcript, model, tokenizer, sample_rate,
+                    transcript_clean=transcript_clean
+                )
+        waveform, sample_rate = load_audio(waveform, sample_rate)
+    
+    with torch.inference_mode():
         if bundle is not None:
             return _mms_alignment(
-                waveform, transcript, model, tokenizer, sample_rate
+                waveform, transcript, model, tokenizer, sample_rate,
+                transcript_clean=transcript_clean
             )
         else:
             return _wav2vec_alignment(
@@ -50,13 +130,161 @@ def perform_ctc_forced_alignment(
             )
 
 
+def perform_ctc_forced_alignment_batch(
+    waveforms: List[torch.Tensor],
+    transcripts: List[str],
+    sample_rate: int = 16000,
+    transcripts_clean: Optional[List[Optional[str]]] = None
+) -> List[List[AlignedToken]]:
+    """
+    Perform CTC forced alignment for a batch of utterances.
+
+    Waveforms are zero-padded to the longest item so the acoustic model
+    runs a single forward pass for the whole batch. The CTC alignment is
+    then done per utterance on its unpadded emission frames.
+
+    Unlike the single-item path, a failed forward pass raises instead of
+    returning uniform timestamps, so callers can retry item by item.
+
+    Args:
+        waveforms: List of mono waveform tensors of shape [1, samples]
+        transcripts: Text transcripts, one per waveform
+        sample_rate: Audio sample rate
+        transcripts_clean: Precomputed normalized transcripts, if known
+
+    Returns:
+        List of AlignedToken lists, one per utterance
+    """
+    return [
+        arrays.to_tokens()
+        for arrays in perform_ctc_forced_alignment_batch_arrays(
+            waveforms, transcripts, sample_rate, transcripts_clean
+        )
+    ]
+
+
+def perform_ctc_forced_alignment_batch_arrays(
+    waveforms: List[torch.Tensor],
+    transcripts: List[str],
+    sample_rate: int = 16000,
+    transcripts_clean: Optional[List[Optional[str]]] = None
+) -> List[AlignedTokenArrays]:
+    """
+    Batched variant of perform_ctc_forced_alignment_arrays.
+    
+    See perform_ctc_forced_alignment_batch for details.
+    
+    Returns:
+        List of AlignedTokenArrays, one per utterance
+    """
+    if not waveforms:
+        return []
+
+    if transcripts_clean is None:
+        transcripts_clean = [None] * len(transcripts)
+
+    bundle, model, tokenizer = get_forced_alignment_model()
+
+    if bundle is None:
+        # wav2vec2 fallback goes through the HF processor, align one by one
+        return [
+            perform_ctc_forced_alignment_arrays(waveform, transcript, sample_rate)
+            for waveform, transcript in zip(waveforms, transcripts)
+        ]
+
+    transcripts = [t.upper().strip() for t in transcripts]
+
+    with torch.inference_mode():
+        try:
+            emissions, emission_lengths = _mms_batch_emissions(model, waveforms)
+        except Exception as e:
+            # Let the caller decide how to fall back (usually per item)
+            logger.error("MMS_FA batched forward failed: %s", e)
+            raise
+
+        results = []
+        for i, (waveform, transcript, transcript_clean) in enumerate(
+            zip(waveforms, transcripts, transcripts_clean)
+        ):
+            num_frames = (
+                int(emission_lengths[i]) if emission_lengths is not None
+                else emissions.shape[1]
+            )
+            results.append(_mms_align_emissions(
+                emissions[i:i + 1, :num_frames],
+                transcript,
+                tokenizer,
+                waveform.shape[1],
+                sample_rate,
+                transcript_clean=transcript_clean
+            ))
+
+    return results
+
+
+def _mms_batch_emissions(
+    model,
+    waveforms: List[torch.Tensor]
+) -> Tuple[torch.Tensor, Optional[torch.Tensor]]:
+    """
+    Run the MMS_FA model once over a zero-padded batch of waveforms.
+    
+    The torchaudio wrapper layer-norms the whole input tensor (padding
+    included) and appends a star column shaped for a batch of one, so it
+    only works unbatched. This repeats its steps per utterance: each
+    waveform is normalized over its own samples, the padded batch goes
+    through the inner wav2vec2 model, then log_softmax and the star
+    column are applied for all B items.
+    
+    Returns:
+        Tuple of (fp32 emissions [B, frames, vocab], valid frames per item)
+    """
+    device, dtype = get_alignment_device()
+    # torch.compile wraps the module; the inner model is on the original
+    wrapper = getattr(model, '_orig_mod', model)
+    
+    # Mirrors torchaudio's private _Wav2Vec2Model.forward. If its layout
+    # changes, fail here so the caller falls back to per-item alignment
+    # instead of silently aligning unnormalized logits.
+    missing = [
+        name for name in _MMS_WRAPPER_ATTRS if not hasattr(wrapper, name)
+    ]
+    if missing:
+        raise RuntimeError(
+            f"Unexpected MMS_FA model wrapper, missing {', '.join(missing)}"
+        )
+    
+    lengths = torch.tensor([w.shape[1] for w in waveforms])
+    waveforms = [w.to(device, dtype) for w in waveforms]
+    if wrapper.normalize_waveform:
+        waveforms = [
+            torch.nn.functional.layer_norm(w, w.shape) for w in waveforms
+        ]
+    batch = pad_sequence([w[0] for w in waveforms], batch_first=True)
+    
+    with alignment_autocast():
+        emissions, emission_lengths = wrapper.model(batch, lengths.to(device))
+        if wrapper.apply_log_softmax:
+            emissions = torch.nn.functional.log_softmax(emissions, dim=-1)
+        if wrapper.append_star:
+            star = emissions.new_zeros(emissions.shape[0], emissions.shape[1], 1)
+            emissions = torch.cat((emissions, star), dim=-1)
+    
+    # forced_align needs fp32 emissions; keep them on the model device
+    emissions = emissions.float()
+    if emission_lengths is not None:
+        emission_lengths = emission_lengths.cpu()
+    return emissions, emission_lengths
+
+
 def _mms_alignment(
     waveform: torch.Tensor,
     transcript: str,
     model,
     tokenizer,
-    sample_rate: int
-) -> List[AlignedToken]:
+    sample_rate: int,
+    transcript_clean: Optional[str] = None
+) -> AlignedTokenArrays:
     """
     Alignment using MMS_FA pipeline.
     
@@ -67,97 +295,241 @@ def _mms_alignment(
     Index 0 is '-' (separator). Blank is NOT in the dictionary
     but is handled by torchaudio.functional.forced_align internally.
     """
+    device, dtype = get_alignment_device()
+    
     try:
         # Get emission probabilities
-        emissions, _ = model(waveform)
+        with alignment_autocast():
+            emissions, _ = model(waveform.to(device, dtype))
+        # forced_align needs fp32 emissions; keep them on the model device
+        emissions = emissions.float()
+    except Exception as e:
+        logger.error("MMS_FA alignment failed: %s", e)
+        return _fallback_uniform_alignment(
+            transcript, waveform.shape[1], sample_rate,
+            transcript_clean=transcript_clean
+        )
+    
+    return _mms_align_emissions(
+        emissions, transcript, tokenizer, waveform.shape[1], sample_rate,
+        transcript_clean=transcript_clean
+    )
+
+
+def _mms_streamed_alignment(
+    audio_path: Union[str, os.PathLike],
+    transcript: str,
+    model,
+    tokenizer,
+    sample_rate: int,
+    transcript_clean: Optional[str] = None
+) -> AlignedTokenArrays:
+    """
+    MMS_FA alignment for an audio file streamed in fixed-size windows.
+    
+    CTC alignment only needs the emission matrix, so emissions from each
+    window are concatenated along time and aligned in one pass.
+    """
+    try:
+        emissions, num_samples = _stream_emissions(audio_path, model, sample_rate)
+    except Exception as e:
+        logger.error("MMS_FA streamed alignment failed: %s", e)
+        try:
+            num_samples = int(get_audio_duration(audio_path) * sample_rate)
+        except Exception:
+            # Unreadable header too; timestamps collapse to zero length
+            num_samples = 0
+        return _fallback_uniform_alignment(
+            transcript, num_samples, sample_rate, transcript_clean=transcript_clean
+        )
+    
+    return _mms_align_emissions(
+        emissions, transcript, tokenizer, num_samples, sample_rate,
+        transcript_clean=transcript_clean
+    )
+
+
+def _stream_emissions(
+    audio_path: Union[str, os.PathLike],
+    model,
+    sample_rate: int
+) -> Tuple[torch.Tensor, int]:
+    """
+    Run the model over an audio file window by window.
+    
+    Returns:
+        Tuple of (fp32 emissions [1, frames, vocab], mono samples consumed
+        at sample_rate)
+    """
+    device, dtype = get_alignment_device()
+    file_rate = torchaudio.info(audio_path).sample_rate
+    window = file_rate * STREAM_CHUNK_SECONDS
+    
+    resampler = None
+    if file_rate != sample_rate:
+        resampler = get_resampler(file_rate, sample_rate)
+    
+    chunks = []
+    num_samples = 0
+    offset = 0
+    
+    while True:
+        chunk, _ = torchaudio.load(audio_path, frame_offset=offset, num_frames=window)
+        read = chunk.shape[1]
+        offset += read
         
+        if chunk.shape[0] > 1:
+            chunk = chunk.mean(dim=0, keepdim=True)
+        if resampler is not None:
+            chunk = resampler(chunk)
+        
+        # A trailing fragment too short to produce a frame is dropped
+        if chunk.shape[1] >= MIN_MODEL_SAMPLES:
+            with alignment_autocast():
+                emissions, _ = model(chunk.to(device, dtype))
+            chunks.append(emissions.float())
+            num_samples += chunk.shape[1]
+        
+        if read < window:
+            break
+    
+    if not chunks:
+        raise ValueError(f"Audio too short to align: {audio_path}")
+    
+    return torch.cat(chunks, dim=1), num_samples
+
+
+def _mms_align_emissions(
+    emissions: torch.Tensor,
+    transcript: str,
+    tokenizer,
+    num_samples: int,
+    sample_rate: int,
+    transcript_clean: Optional[str] = None
+) -> AlignedTokenArrays:
+    """
+    Run CTC forced alignment on precomputed MMS_FA emissions.
+    
+    Args:
+        emissions: Emission log-probabilities of shape [1, frames, vocab]
+        transcript: Uppercased text transcript
+        tokenizer: MMS_FA tokenizer
+        num_samples: Length in samples of the (unpadded) audio
+        sample_rate: Audio sample rate
+        transcript_clean: Precomputed normalize_transcript(transcript), if known
+    """
+    try:
         # MMS_FA uses lowercase characters in its vocabulary
         # Dictionary: {'-': 0, 'a': 1, 'i': 2, ...}
         # CTC dimension: 29 (indices 0-28)
         # IMPORTANT: Index 0 is separator AND CTC blank
         # We cannot have index 0 in targets, so we remove spaces entirely
-        transcript_clean = transcript.lower().replace(" ", "")
-        
-        # Filter out any non-alphabetic characters
-        transcript_clean = ''.join(c for c in transcript_clean if c.isalpha())
+        # along with any non-alphabetic characters
+        if transcript_clean is None:
+            transcript_clean = normalize_transcript(transcript)
         
         # Get the dictionary from tokenizer
         if hasattr(tokenizer, 'dictionary'):
             char_to_idx = tokenizer.dictionary
-            logger.debug(f"MMS_FA dictionary has {len(char_to_idx)} entries")
+            logger.debug("MMS_FA dictionary has %d entries", len(char_to_idx))
         else:
             logger.error("MMS_FA tokenizer has no dictionary attribute")
-            return _fallback_uniform_alignment(transcript, waveform, sample_rate)
+            return _fallback_uniform_alignment(
+                transcript, num_samples, sample_rate, transcript_clean=transcript_clean
+            )
         
         # Get CTC dimension to validate token indices
         ctc_dim = emissions.shape[2]  # Shape: [batch, frames, vocab_size]
-        logger.debug(f"CTC dimension: {ctc_dim}, transcript: '{transcript_clean[:30]}...'")
+        logger.debug("CTC dimension: %d, transcript: '%.30s...'", ctc_dim, transcript_clean)
         
-        # Convert characters to token IDs
+        # Convert characters to token IDs with one LUT gather
         # Dictionary indices are 0-28, CTC blank is 0
         # We use dictionary indices directly, but skip index 0 (separator)
-        tokens = []
-        for char in transcript_clean:
-            if char in char_to_idx:
-                idx = char_to_idx[char]
-                # Index 0 is the CTC blank in forced_align, cannot be used
-                if idx == 0:
-                    continue  # Skip separator character
-                tokens.append(idx)
-            # Skip unknown characters silently
+        # and unknown characters (-1)
+        chars = np.frombuffer(
+            transcript_clean.encode('ascii', 'ignore'), dtype=np.uint8
+        )
+        ids = _get_mms_lut(char_to_idx)[chars]
+        keep = ids > 0
+        tokens = ids[keep]
+        token_chars = chars[keep].tobytes().decode('ascii')
         
         # Validate we have tokens
-        if not tokens:
+        if tokens.size == 0:
             logger.error("No valid tokens generated from transcript")
-            return _fallback_uniform_alignment(transcript, waveform, sample_rate)
+            return _fallback_uniform_alignment(
+                transcript, num_samples, sample_rate, transcript_clean=transcript_clean
+            )
         
         # Validate token indices are within CTC dimension
-        max_token = max(tokens)
+        max_token = int(tokens.max())
         if max_token >= ctc_dim:
-            logger.error(f"Token index {max_token} exceeds CTC dim {ctc_dim}")
-            return _fallback_uniform_alignment(transcript, waveform, sample_rate)
+            logger.error("Token index %d exceeds CTC dim %d", max_token, ctc_dim)
+            return _fallback_uniform_alignment(
+                transcript, num_samples, sample_rate, transcript_clean=transcript_clean
+            )
         
-        logger.debug(f"Token indices: {tokens[:10]}... (len={len(tokens)}, min={min(tokens)}, max={max_token})")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Token indices: %s... (len=%d, min=%d, max=%d)",
+                tokens[:10].tolist(), len(tokens), int(tokens.min()), max_token
+            )
         
-        # Perform forced alignment
+        # Perform forced alignment on the emissions' device (CUDA kernel
+        # on GPU), then copy the small per-frame result back once
+        device = emissions.device
         aligned_tokens, scores = torchaudio.functional.forced_align(
             emissions,
-            targets=torch.tensor([tokens], dtype=torch.int32),
-            input_lengths=torch.tensor([emissions.shape[1]]),
-            target_lengths=torch.tensor([len(tokens)]),
+            targets=torch.from_numpy(tokens).unsqueeze(0).to(device),
+            input_lengths=torch.tensor([emissions.shape[1]], device=device),
+            target_lengths=torch.tensor([len(tokens)], device=device),
             blank=0
         )
+        aligned_tokens = aligned_tokens.cpu()
+        scores = scores.cpu()
         
-        # Convert frame indices to timestamps
-        frame_duration = waveform.shape[1] / sample_rate / emissions.shape[1]
+        # forced_align returns one label per frame; collapse runs of the
+        # same non-blank label into token spans (like merge_tokens does)
+        labels = aligned_tokens[0].numpy()
+        frame_probs = np.exp(scores[0].numpy())
+        nonblank = labels != 0
+        starts = np.flatnonzero(nonblank & (np.diff(labels, prepend=0) != 0))
+        span_ends = np.flatnonzero(nonblank & (np.diff(labels, append=0) != 0)) + 1
         
-        results = []
-        token_list = list(transcript_clean)
+        if starts.size == 0:
+            logger.error("Forced alignment produced no token spans")
+            return _fallback_uniform_alignment(
+                transcript, num_samples, sample_rate, transcript_clean=transcript_clean
+            )
+        
+        # Token score: mean frame probability over its span
+        cum_probs = np.concatenate(([0.0], np.cumsum(frame_probs)))
+        token_scores = (cum_probs[span_ends] - cum_probs[starts]) / (span_ends - starts)
         
-        for i, (token_idx, score) in enumerate(zip(aligned_tokens[0], scores[0])):
-            if i < len(token_list):
-                char = token_list[i]
-                start_frame = token_idx.item()
-                
-                if i + 1 < len(aligned_tokens[0]):
-                    end_frame = aligned_tokens[0][i + 1].item()
-                else:
-                    end_frame = emissions.shape[1]
-                
-                results.append(AlignedToken(
-                    token=char,
-                    start=round(start_frame * frame_duration, 3),
-                    end=round(end_frame * frame_duration, 3),
-                    score=score.item()
-                ))
+        # Each token lasts until the next one starts
+        num_frames = emissions.shape[1]
+        ends = np.empty_like(starts)
+        ends[:-1] = starts[1:]
+        ends[-1] = num_frames
         
-        logger.info(f"MMS_FA alignment successful for {len(results)} tokens")
+        # Convert frame indices to timestamps
+        frame_duration = num_samples / sample_rate / num_frames
+        results = AlignedTokenArrays(
+            tokens=list(token_chars),
+            starts=np.round(starts * frame_duration, 3),
+            ends=np.round(ends * frame_duration, 3),
+            scores=token_scores
+        )
+        
+        logger.info("MMS_FA alignment successful for %d tokens", len(token_chars))
         return results
         
     except Exception as e:
-        logger.error(f"MMS_FA alignment failed: {str(e)}")
+        logger.error("MMS_FA alignment failed: %s", e)
         # Fall back to simple uniform distribution
-        return _fallback_uniform_alignment(transcript, waveform, sample_rate)
+        return _fallback_uniform_alignment(
+            transcript, num_samples, sample_rate, transcript_clean=transcript_clean
+        )
 
 
 def _wav2vec_alignment(
@@ -166,12 +538,12 @@ def _wav2vec_alignment(
     model,
     processor,
     sample_rate: int
-) -> List[AlignedToken]:
+) -> AlignedTokenArrays:
     """
     Fallback alignment using wav2vec2 CTC predictions.
     
-    Uses a greedy approach: match predicted characters to expected
-    text based on emission probabilities and frame positions.
+    Matches greedily decoded characters to the expected text with a
+    DP alignment over emission probabilities and frame positions.
     """
     # Process audio
     input_values = processor(
@@ -180,14 +552,18 @@ def _wav2vec_alignment(
         sampling_rate=sample_rate
     ).input_values
     
+    device, dtype = get_alignment_device()
+    
     # Get emissions (log probabilities)
-    with torch.no_grad():
-        outputs = model(input_values)
-        logits = outputs.logits
-        log_probs = torch.log_softmax(logits, dim=-1)
+    with torch.inference_mode(), alignment_autocast():
+        outputs = model(input_values.to(device, dtype))
+    
+    with torch.inference_mode():
+        logits = outputs.logits.float().cpu()
     
-    # Get predicted character indices
-    pred_ids = torch.argmax(log_probs, dim=-1)[0]
+    # Get predicted character indices (argmax of logits == argmax of
+    # log-probs; log_softmax is only taken for the frames that need it)
+    pred_ids = torch.argmax(logits, dim=-1)[0]
     
     # Calculate frame duration
     num_frames = logits.shape[1]
@@ -196,7 +572,7 @@ def _wav2vec_alignment(
     
     # Extract character segments
     char_segments = _extract_char_segments(
-        pred_ids, log_probs, processor, frame_duration
+        pred_ids, logits, processor, frame_duration
     )
     
     # Match to transcript
@@ -210,119 +586,152 @@ def _wav2vec_alignment(
 
 def _extract_char_segments(
     pred_ids: torch.Tensor,
-    log_probs: torch.Tensor,
+    logits: torch.Tensor,
     processor,
     frame_duration: float
-) -> List[dict]:
+) -> CharSegments:
     """
     Extract character segments with their frame ranges.
+    
+    Runs of identical predicted ids are found with a single NumPy scan;
+    blank runs are dropped and the log-prob at each run's middle frame
+    is computed from just those frames' logits.
     """
-    char_segments = []
-    current_char_id = None
-    start_frame = 0
-    num_frames = len(pred_ids)
+    ids = pred_ids.cpu().numpy()
+    num_frames = len(ids)
     
-    for frame_idx, char_id in enumerate(pred_ids):
-        char_id = char_id.item()
-        
-        if char_id != current_char_id:
-            if current_char_id is not None and current_char_id != 0:
-                char = processor.decode([current_char_id])
-                if char.strip():
-                    mid_frame = (start_frame + frame_idx) // 2
-                    prob = log_probs[0, mid_frame, current_char_id].item()
-                    
-                    char_segments.append({
-                        'char': char,
-                        'start_frame': start_frame,
-                        'end_frame': frame_idx,
-                        'prob': prob
-                    })
-            
-            current_char_id = char_id
-            start_frame = frame_idx
-    
-    # Handle last segment
-    if current_char_id is not None and current_char_id != 0:
-        char = processor.decode([current_char_id])
-        if char.strip():
-            mid_frame = (start_frame + num_frames) // 2
-            prob = log_probs[0, mid_frame, current_char_id].item()
-            
-            char_segments.append({
-                'char': char,
-                'start_frame': start_frame,
-                'end_frame': num_frames,
-                'prob': prob
-            })
-    
-    return char_segments
+    if num_frames == 0:
+        return _empty_char_segments()
+    
+    # Run boundaries: frames where the predicted id changes
+    starts = np.flatnonzero(np.diff(ids, prepend=-1))
+    ends = np.append(starts[1:], num_frames)
+    char_ids = ids[starts]
+    
+    # Drop blank (pad) runs
+    keep = char_ids != 0
+    starts, ends, char_ids = starts[keep], ends[keep], char_ids[keep]
+    
+    if len(char_ids) == 0:
+        return _empty_char_segments()
+    
+    mid_frames = (starts + ends) // 2
+    mid_log_probs = torch.log_softmax(
+        logits[0, torch.from_numpy(mid_frames)], dim=-1
+    )
+    probs = mid_log_probs.gather(
+        1, torch.from_numpy(char_ids).long().unsqueeze(1)
+    ).squeeze(1).cpu().numpy()
+    
+    chars = np.array(processor.batch_decode(char_ids.reshape(-1, 1).tolist()))
+    
+    # Drop runs that decode to whitespace (word delimiter)
+    keep = np.char.str_len(np.char.strip(chars)) > 0
+    
+    return CharSegments(
+        chars=chars[keep],
+        start=starts[keep],
+        end=ends[keep],
+        prob=probs[keep]
+    )
+
+
+def _empty_char_segments() -> CharSegments:
+    """Return a CharSegments with no entries."""
+    return CharSegments(
+        chars=np.array([], dtype=str),
+        start=np.array([], dtype=np.int64),
+        end=np.array([], dtype=np.int64),
+        prob=np.array([], dtype=np.float32)
+    )
 
 
 def _align_segments_to_transcript(
-    detected_segments: List[dict],
+    detected_segments: CharSegments,
     transcript_chars: List[str],
     frame_duration: float
-) -> List[AlignedToken]:
+) -> AlignedTokenArrays:
     """
     Align detected character segments to expected transcript.
     
-    Uses greedy matching with fallback interpolation.
+    Uses a forward DP (LCS-style, like edit distance without
+    substitutions) over the transcript x segments match matrix. Every
+    match is worth 1 plus the segment probability, so the path maximises
+    the number of matched characters and prefers confident segments on
+    ties. Unmatched characters are spread evenly between their nearest
+    matched neighbours.
     """
-    if not detected_segments or not transcript_chars:
-        return []
+    if not len(detected_segments) or not transcript_chars:
+        return AlignedTokenArrays.empty()
     
-    results = []
-    seg_idx = 0
+    n = len(transcript_chars)
+    m = len(detected_segments)
     
-    last_end = detected_segments[-1]['end_frame']
-    total_duration = last_end * frame_duration
+    expected = np.char.upper(np.array(transcript_chars))
+    seg_chars = np.char.upper(detected_segments.chars)
+    match = expected[:, None] == seg_chars[None, :]
+    gain = np.where(match, 1.0 + np.exp(detected_segments.prob)[None, :], -np.inf)
     
-    for char_idx, expected_char in enumerate(transcript_chars):
-        expected_upper = expected_char.upper()
-        matched = False
-        
-        # Look for matching segment
-        search_end = min(seg_idx + 5, len(detected_segments))
-        
-        for i in range(seg_idx, search_end):
-            seg = detected_segments[i]
-            
-            if seg['char'].upper() == expected_upper:
-                start = seg['start_frame'] * frame_duration
-                end = seg['end_frame'] * frame_duration
-                score = min(1.0, max(0.0, 0.5 + seg['prob']))
-                
-                results.append(AlignedToken(
-                    token=expected_char,
-                    start=round(start, 3),
-                    end=round(end, 3),
-                    score=score
-                ))
-                seg_idx = i + 1
-                matched = True
-                break
-        
-        if not matched:
-            # Interpolate position
-            progress = char_idx / len(transcript_chars)
-            char_duration = total_duration / len(transcript_chars)
-            
-            results.append(AlignedToken(
-                token=expected_char,
-                start=round(progress * total_duration, 3),
-                end=round(progress * total_duration + char_duration, 3),
-                score=0.5
-            ))
+    # dp[i, j]: best score aligning the first i chars to the first j segments.
+    # dp[i, j] = max(dp[i-1, j-1] + gain, dp[i-1, j], dp[i, j-1]); the last
+    # term is a running max along the row.
+    dp = np.zeros((n + 1, m + 1))
+    for i in range(1, n + 1):
+        row = np.maximum(dp[i - 1, :-1] + gain[i - 1], dp[i - 1, 1:])
+        dp[i, 1:] = np.maximum.accumulate(row)
     
-    return results
+    # Backtrack to find which segment (if any) each character matched
+    assigned = np.full(n, -1)
+    i, j = n, m
+    while i > 0 and j > 0:
+        if match[i - 1, j - 1] and dp[i, j] == dp[i - 1, j - 1] + gain[i - 1, j - 1]:
+            assigned[i - 1] = j - 1
+            i -= 1
+            j -= 1
+        elif dp[i, j] == dp[i - 1, j]:
+            i -= 1
+        else:
+            j -= 1
+    
+    total_duration = detected_segments.end[-1] * frame_duration
+    
+    matched = assigned >= 0
+    seg_idx = assigned[matched]
+    starts = np.empty(n)
+    ends = np.empty(n)
+    scores = np.full(n, 0.5)
+    starts[matched] = detected_segments.start[seg_idx] * frame_duration
+    ends[matched] = detected_segments.end[seg_idx] * frame_duration
+    scores[matched] = np.clip(0.5 + detected_segments.prob[seg_idx], 0.0, 1.0)
+    
+    if not matched.all():
+        # Piecewise-linear map from character position to time, anchored
+        # on matched characters and the audio bounds
+        k = np.flatnonzero(matched)
+        xp = np.concatenate(([0], np.column_stack((k, k + 1)).ravel(), [n]))
+        fp = np.concatenate((
+            [0.0],
+            np.column_stack((starts[k], ends[k])).ravel(),
+            [total_duration]
+        ))
+        unmatched = np.flatnonzero(~matched)
+        starts[unmatched] = np.interp(unmatched, xp, fp)
+        ends[unmatched] = np.interp(unmatched + 1, xp, fp)
+    
+    return AlignedTokenArrays(
+        tokens=transcript_chars,
+        starts=np.round(starts, 3),
+        ends=np.round(ends, 3),
+        scores=scores
+    )
 
 
 def _fallback_uniform_alignment(
     transcript: str,
-    waveform: torch.Tensor,
-    sample_rate: int
-) -> List[AlignedToken]:
+    num_samples: int,
+    sample_rate: int,
+    transcript_clean: Optional[str] = None
+) -> AlignedTokenArrays:
     """
     Fallback to uniform distribution when alignment fails.
     
@@ -332,24 +741,23 @@ def _fallback_uniform_alignment(
     logger.warning("Using uniform fallback alignment")
     
     # Match MMS_FA preprocessing: lowercase, remove spaces and punctuation
-    transcript_clean = transcript.lower().replace(" ", "")
-    transcript_clean = ''.join(c for c in transcript_clean if c.isalpha())
+    if transcript_clean is None:
+        transcript_clean = normalize_transcript(transcript)
     chars = list(transcript_clean)
     
     if not chars:
-        return []
+        return AlignedTokenArrays.empty()
     
-    audio_duration = waveform.shape[1] / sample_rate
+    audio_duration = num_samples / sample_rate
     char_duration = audio_duration / len(chars)
     
-    results = []
-    for i, char in enumerate(chars):
-        results.append(AlignedToken(
-            token=char,
-            start=round(i * char_duration, 3),
-            end=round((i + 1) * char_duration, 3),
-            score=0.5
-        ))
+    # Character i spans [edges[i], edges[i + 1])
+    edges = np.round(np.arange(len(chars) + 1) * char_duration, 3)
     
-    return results
+    return AlignedTokenArrays(
+        tokens=chars,
+        starts=edges[:-1],
+        ends=edges[1:],
+        scores=np.full(len(chars), 0.5)
+    )
 
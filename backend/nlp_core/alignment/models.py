@@ -4,7 +4,9 @@ Model Loading for Forced Alignment.
 Handles singleton model loading for alignment models.
 """
 
+import contextlib
 import logging
+from typing import Tuple
 import torch
 import torchaudio
 
@@ -15,6 +17,11 @@ _aligner_bundle = None
 _aligner_model = None
 _aligner_tokenizer = None
 
+# Where the alignment forward runs; set once the model is loaded
+_aligner_device = torch.device('cpu')
+_aligner_dtype = torch.float32
+_aligner_cpu_autocast = False
+
 
 def get_forced_alignment_model():
     """
@@ -36,6 +43,8 @@ def get_forced_alignment_model():
             _aligner_model = _aligner_bundle.get_model()
             _aligner_tokenizer = _aligner_bundle.get_tokenizer()
             _aligner_model.eval()
+            _place_model()
+            _compile_model()
             logger.info("MMS_FA forced alignment model loaded")
             
         except AttributeError:
@@ -52,11 +61,104 @@ def get_forced_alignment_model():
                 "facebook/wav2vec2-base-960h"
             )
             _aligner_model.eval()
+            _place_model()
             logger.info("Wav2Vec2 fallback model loaded")
     
     return _aligner_bundle, _aligner_model, _aligner_tokenizer
 
 
+def _place_model():
+    """
+    Pick device and precision for the alignment model.
+    
+    On GPU the weights are moved to CUDA in fp16. On CPUs with native
+    bf16 support the weights stay fp32 and the forward pass runs under
+    bf16 autocast. Otherwise the model runs in plain fp32.
+    """
+    global _aligner_model, _aligner_device, _aligner_dtype, _aligner_cpu_autocast
+    
+    if torch.cuda.is_available():
+        _aligner_device = torch.device('cuda')
+        _aligner_dtype = torch.float16
+        _aligner_model = _aligner_model.to(_aligner_device).half()
+        logger.info("Alignment model running on CUDA in fp16")
+    elif _cpu_supports_bf16():
+        _aligner_cpu_autocast = True
+        logger.info("Alignment model running on CPU with bf16 autocast")
+
+
+def _compile_model():
+    """
+    Compile the MMS_FA model with torch.compile when available.
+    
+    Audio lengths vary per file, so the graph is compiled with dynamic
+    shapes in the default mode; CUDA graphs would record a new graph for
+    every distinct length. Compilation is lazy, so failures are handled
+    on call by _CompiledModel rather than here.
+    """
+    global _aligner_model
+    
+    if not hasattr(torch, 'compile'):
+        return
+    
+    try:
+        _aligner_model = _CompiledModel(_aligner_model)
+        logger.info("Alignment model compiled with torch.compile")
+    except Exception as e:
+        logger.warning("torch.compile unavailable, running eager: %s", e)
+
+
+class _CompiledModel:
+    """
+    Callable wrapping a torch.compile'd model with an eager fallback.
+    
+    If compiling raises (dynamo or backend compiler failure), the
+    compiled model is dropped for the rest of the process and the call is
+    retried on the eager model. Any other error, e.g. a CUDA OOM or an
+    input too short for the conv front-end, propagates unchanged. The
+    eager module is exposed as `_orig_mod`, like torch.compile's own
+    wrapper.
+    """
+    
+    def __init__(self, model):
+        import torch._dynamo
+        
+        self._orig_mod = model
+        self._compiled = torch.compile(model, dynamic=True)
+        self._compile_errors = torch._dynamo.exc.TorchDynamoException
+    
+    def __call__(self, *args, **kwargs):
+        if self._compiled is not None:
+            try:
+                return self._compiled(*args, **kwargs)
+            except self._compile_errors as e:
+                logger.warning("Compiled alignment model failed, running eager: %s", e)
+                self._compiled = None
+        return self._orig_mod(*args, **kwargs)
+
+
+def _cpu_supports_bf16() -> bool:
+    """Check for native bf16 support on the CPU (AVX512-BF16 / AMX)."""
+    check = getattr(torch.cpu, '_is_avx512_bf16_supported', None)
+    try:
+        return bool(check and check())
+    except Exception:
+        return False
+
+
+def get_alignment_device() -> Tuple[torch.device, torch.dtype]:
+    """Return the (device, dtype) that alignment model inputs must use."""
+    get_forced_alignment_model()
+    return _aligner_device, _aligner_dtype
+
+
+def alignment_autocast():
+    """Context manager for the alignment forward pass."""
+    if _aligner_cpu_autocast:
+        return torch.autocast('cpu', dtype=torch.bfloat16)
+    return contextlib.nullcontext()
+
+
 def is_mms_available() -> bool:
     """Check if MMS_FA bundle is being used."""
     bundle, _, _ = get_forced_alignment_model()
@@ -5,22 +5,30 @@ Extracts phoneme boundaries using word alignment and G2P interpolation.
 """
 
 import logging
-from typing import List, Optional
+from functools import lru_cache
+from typing import List, Optional, Tuple, Union
+import numpy as np
+import torch
 
 from .utils import (
+    AlignedPhonemes,
+    get_audio_duration,
     load_audio, 
-    strip_stress, 
-    get_phoneme_duration_weights
+    get_phoneme_weight_array
 )
-from .word_aligner import get_word_timestamps
+from .word_aligner import get_word_timestamps, get_word_timestamps_batch
+from ._numeric import alloc_times
 
 logger = logging.getLogger(__name__)
 
 
 def get_phoneme_timestamps(
     audio_path: str, 
-    expected_phonemes: List[str]
-) -> List[dict]:
+    expected_phonemes: List[str],
+    waveform: Optional[torch.Tensor] = None,
+    sample_rate: int = 16000,
+    as_arrays: bool = False
+) -> Union[List[dict], AlignedPhonemes]:
     """
     Get phoneme-level timestamps using weighted distribution.
     
@@ -30,54 +38,47 @@ def get_phoneme_timestamps(
     Args:
         audio_path: Path to cleaned audio file
         expected_phonemes: Expected ARPAbet phoneme sequence from G2P
+        waveform: Already loaded waveform [1, T]; skips reading audio_path
+        sample_rate: Sample rate of waveform
+        as_arrays: Return an AlignedPhonemes instead of a list of dicts
     
     Returns:
         List of phoneme timestamps:
         [{"phoneme": "SH", "start": 0.0, "end": 0.12}, ...]
     """
     if not expected_phonemes:
-        return []
+        return AlignedPhonemes.empty() if as_arrays else []
     
-    # Load audio to get duration
-    waveform, sample_rate = load_audio(audio_path)
-    audio_duration = waveform.shape[1] / sample_rate
-    
-    # Get phoneme duration weights
-    phoneme_weights = get_phoneme_duration_weights()
+    # Duration from the loaded waveform, or from file metadata alone
+    if waveform is None:
+        audio_duration = get_audio_duration(audio_path)
+    else:
+        audio_duration = waveform.shape[1] / sample_rate
     
     # Calculate weighted distribution
-    total_weight = sum(
-        phoneme_weights.get(strip_stress(p), 1.0) 
-        for p in expected_phonemes
-    )
-    
-    phoneme_timestamps = []
-    current_time = 0.0
+    weights, starts, ends = _weighted_spans(expected_phonemes, 0.0, audio_duration)
     
-    for i, phoneme in enumerate(expected_phonemes):
-        base_phoneme = strip_stress(phoneme)
-        weight = phoneme_weights.get(base_phoneme, 1.0)
-        duration = (weight / total_weight) * audio_duration
-        
-        phoneme_timestamps.append({
-            'phoneme': phoneme,
-            'start': round(current_time, 3),
-            'end': round(current_time + duration, 3),
-            'index': i,
-            'weight': weight
-        })
-        
-        current_time += duration
+    result = AlignedPhonemes(
+        phonemes=list(expected_phonemes),
+        starts=starts,
+        ends=ends,
+        weights=weights
+    )
     
-    logger.debug(f"Generated timestamps for {len(expected_phonemes)} phonemes")
-    return phoneme_timestamps
+    logger.debug("Generated timestamps for %d phonemes", len(expected_phonemes))
+    return result if as_arrays else result.to_list()
 
 
 def get_phoneme_timestamps_with_text(
     audio_path: str,
     text: str,
-    expected_phonemes: Optional[List[str]] = None
-) -> List[dict]:
+    expected_phonemes: Optional[List[str]] = None,
+    transcript_clean: Optional[str] = None,
+    waveform: Optional[torch.Tensor] = None,
+    sample_rate: int = 16000,
+    word_timestamps: Optional[List[dict]] = None,
+    as_arrays: bool = False
+) -> Union[List[dict], AlignedPhonemes]:
     """
     Get phoneme-level timestamps using word-level forced alignment.
     
@@ -90,18 +91,104 @@ def get_phoneme_timestamps_with_text(
         audio_path: Path to audio file
         text: Text transcript
         expected_phonemes: Precomputed phoneme sequence (preferred) or None for G2P
+        transcript_clean: Precomputed normalized transcript, if known
+        waveform: Already loaded mono waveform [1, T]; skips reading audio_path
+        sample_rate: Sample rate of waveform
+        word_timestamps: Word timestamps from get_word_timestamps, if
+            already computed; skips the forced alignment
+        as_arrays: Return an AlignedPhonemes instead of a list of dicts
     
     Returns:
         List of phoneme timestamps with word context
     """
-    from nlp_core.phoneme_extractor import text_to_phonemes_with_words
-    
     # Step 1: Get word-level timestamps
-    word_timestamps = get_word_timestamps(audio_path, text)
+    if word_timestamps is None:
+        if waveform is None:
+            waveform, sample_rate = load_audio(audio_path)
+        
+        word_timestamps = get_word_timestamps(
+            audio_path, text, transcript_clean=transcript_clean,
+            waveform=waveform, sample_rate=sample_rate
+        )
+    
+    result = _phonemes_from_word_timestamps(
+        audio_path, text, expected_phonemes, word_timestamps,
+        waveform, sample_rate
+    )
+    return result if as_arrays else result.to_list()
+
+
+def get_phoneme_timestamps_batch(
+    audio_paths: List[str],
+    texts: List[str],
+    phoneme_seqs: List[Optional[List[str]]],
+    transcripts_clean: Optional[List[Optional[str]]] = None,
+    waveforms: Optional[List[torch.Tensor]] = None,
+    sample_rate: int = 16000,
+    as_arrays: bool = False
+) -> List[Union[List[dict], AlignedPhonemes]]:
+    """
+    Batched variant of get_phoneme_timestamps_with_text.
+    
+    Word boundaries for all items come from a single batched forward
+    pass of the alignment model; phonemes are then distributed within
+    those boundaries per item.
+    Raises if the batched forward pass fails; align items one by one then.
+    
+    Args:
+        audio_paths: Paths to audio files
+        texts: Text transcripts, one per audio file
+        phoneme_seqs: Precomputed phoneme sequences (or None for G2P)
+        transcripts_clean: Precomputed normalized transcripts, if known
+        waveforms: Already loaded mono waveforms; skips reading audio_paths
+        sample_rate: Sample rate of waveforms
+        as_arrays: Return AlignedPhonemes instead of lists of dicts
+    
+    Returns:
+        List of phoneme timestamp lists, one per audio file
+    """
+    if waveforms is None:
+        waveforms = []
+        for audio_path in audio_paths:
+            waveform, sample_rate = load_audio(audio_path)
+            waveforms.append(waveform)
+    
+    batch_word_timestamps = get_word_timestamps_batch(
+        audio_paths, texts, transcripts_clean=transcripts_clean,
+        waveforms=waveforms, sample_rate=sample_rate
+    )
+    
+    results = [
+        _phonemes_from_word_timestamps(
+            audio_path, text, expected_phonemes, word_timestamps,
+            waveform, sample_rate
+        )
+        for audio_path, text, expected_phonemes, word_timestamps, waveform in zip(
+            audio_paths, texts, phoneme_seqs, batch_word_timestamps, waveforms
+        )
+    ]
+    return results if as_arrays else [result.to_list() for result in results]
+
+
+def _phonemes_from_word_timestamps(
+    audio_path: str,
+    text: str,
+    expected_phonemes: Optional[List[str]],
+    word_timestamps: List[dict],
+    waveform: Optional[torch.Tensor] = None,
+    sample_rate: int = 16000
+) -> AlignedPhonemes:
+    """
+    Build phoneme timestamps from already-computed word boundaries.
+    """
+    from nlp_core.phoneme_extractor import text_to_phonemes_with_words
     
     if not word_timestamps:
         logger.warning("No word timestamps from alignment, using fallback")
-        return get_phoneme_timestamps(audio_path, expected_phonemes or [])
+        return get_phoneme_timestamps(
+            audio_path, expected_phonemes or [],
+            waveform=waveform, sample_rate=sample_rate, as_arrays=True
+        )
     
     # Step 2: Determine phonemes to use
     # PRIORITY: Use expected_phonemes if provided (from database)
@@ -116,9 +203,12 @@ def get_phoneme_timestamps_with_text(
     word_phoneme_map = text_to_phonemes_with_words(text)
     
     # Step 3: Distribute phonemes within word boundaries
-    phoneme_timestamps = []
-    phoneme_index = 0
-    phoneme_weights = get_phoneme_duration_weights()
+    all_phonemes = []
+    all_starts = []
+    all_ends = []
+    all_words = []
+    all_positions = []
+    all_confidences = []
     
     # Match word timestamps with G2P output
     min_len = min(len(word_timestamps), len(word_phoneme_map))
@@ -135,110 +225,113 @@ def get_phoneme_timestamps_with_text(
             continue
         
         # Calculate weighted distribution within word
-        total_weight = sum(
-            phoneme_weights.get(strip_stress(p), 1.0) 
-            for p in phonemes
-        )
+        _, starts, ends = _weighted_spans(phonemes, word_start, word_duration)
         
-        current_time = word_start
-        
-        for j, phoneme in enumerate(phonemes):
-            base_phoneme = strip_stress(phoneme)
-            weight = phoneme_weights.get(base_phoneme, 1.0)
-            duration = (weight / total_weight) * word_duration
-            
-            # Determine position in word
-            if j == 0:
-                position = 'initial'
-            elif j == len(phonemes) - 1:
-                position = 'final'
-            else:
-                position = 'medial'
-            
-            phoneme_timestamps.append({
-                'phoneme': phoneme,
-                'start': round(current_time, 3),
-                'end': round(current_time + duration, 3),
-                'index': phoneme_index,
-                'word': word,
-                'position': position,
-                'confidence': word_ts.get('confidence', 0.5)
-            })
-            
-            current_time += duration
-            phoneme_index += 1
-    
-    logger.debug(f"Aligned {len(phoneme_timestamps)} phonemes using word bounds")
-    return phoneme_timestamps
+        all_phonemes.extend(phonemes)
+        all_starts.append(starts)
+        all_ends.append(ends)
+        all_words.extend([word] * len(phonemes))
+        all_positions.extend(_word_positions(len(phonemes)))
+        all_confidences.extend([word_ts.get('confidence', 0.5)] * len(phonemes))
+    
+    if not all_phonemes:
+        return AlignedPhonemes.empty()
+    
+    result = AlignedPhonemes(
+        phonemes=all_phonemes,
+        starts=np.concatenate(all_starts),
+        ends=np.concatenate(all_ends),
+        words=all_words,
+        positions=all_positions,
+        confidences=np.array(all_confidences, dtype=np.float64)
+    )
+    
+    logger.debug("Aligned %d phonemes using word bounds", len(result))
+    return result
 
 
 def _distribute_phonemes_across_words(
     phonemes: List[str],
     word_timestamps: List[dict],
     text: str
-) -> List[dict]:
+) -> AlignedPhonemes:
     """
     Distribute precomputed phonemes across word boundaries.
     
     This maintains consistency with database-stored phoneme sequences
     while using accurate word-level timing from forced alignment.
     """
-    phoneme_weights = get_phoneme_duration_weights()
-    
     # Calculate total audio duration from word timestamps
     if not word_timestamps:
-        return []
+        return AlignedPhonemes.empty()
     
     total_start = word_timestamps[0]['start']
     total_end = word_timestamps[-1]['end']
     total_duration = total_end - total_start
     
     if total_duration <= 0 or not phonemes:
-        return []
+        return AlignedPhonemes.empty()
     
     # Calculate weighted duration for each phoneme
-    total_weight = sum(
-        phoneme_weights.get(strip_stress(p), 1.0) 
-        for p in phonemes
-    )
+    _, starts, ends = _weighted_spans(phonemes, total_start, total_duration)
     
     # Get word boundaries for position assignment
     words = text.split()
     
-    phoneme_timestamps = []
-    current_time = total_start
+    # Find which word each phoneme belongs to (approximate)
+    n = len(phonemes)
+    if words:
+        word_idxs = (np.arange(n, dtype=np.int64) * len(words) // n).clip(max=len(words) - 1)
+        phoneme_words = [words[j] for j in word_idxs.tolist()]
+    else:
+        phoneme_words = [""] * n
+    
+    result = AlignedPhonemes(
+        phonemes=list(phonemes),
+        starts=starts,
+        ends=ends,
+        words=phoneme_words,
+        positions=_word_positions(n),
+        # Moderate confidence for distributed phonemes
+        confidences=np.full(n, 0.7)
+    )
     
-    for i, phoneme in enumerate(phonemes):
-        base_phoneme = strip_stress(phoneme)
-        weight = phoneme_weights.get(base_phoneme, 1.0)
-        duration = (weight / total_weight) * total_duration
-        
-        # Find which word this phoneme belongs to (approximate)
-        word_idx = min(i * len(words) // len(phonemes), len(words) - 1)
-        word = words[word_idx] if words else ""
-        
-        # Determine position
-        if i == 0:
-            position = 'initial'
-        elif i == len(phonemes) - 1:
-            position = 'final'
-        else:
-            position = 'medial'
-        
-        phoneme_timestamps.append({
-            'phoneme': phoneme,
-            'start': round(current_time, 3),
-            'end': round(current_time + duration, 3),
-            'index': i,
-            'word': word,
-            'position': position,
-            'confidence': 0.7  # Moderate confidence for distributed phonemes
-        })
-        
-        current_time += duration
+    logger.debug(
+        "Distributed %d precomputed phonemes across %d words",
+        len(phonemes), len(word_timestamps)
+    )
+    return result
+
+
+@lru_cache(maxsize=64)
+def _word_positions(n: int) -> Tuple[str, ...]:
+    """
+    Position labels for n consecutive phonemes: initial, medial..., final.
     
-    logger.debug(f"Distributed {len(phonemes)} precomputed phonemes across {len(word_timestamps)} words")
-    return phoneme_timestamps
+    Cached per length; returns a tuple so callers can't mutate the shared copy.
+    """
+    positions = ['medial'] * n
+    positions[-1] = 'final'
+    positions[0] = 'initial'
+    return tuple(positions)
+
+
+def _weighted_spans(
+    phonemes: List[str],
+    start: float,
+    duration: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Split [start, start + duration] across phonemes by duration weight.
+    
+    Returns:
+        Tuple of (weights, starts, ends); times rounded to milliseconds
+    """
+    weights = get_phoneme_weight_array(phonemes)
+    
+    starts, ends = alloc_times(weights, float(start), float(duration))
+    
+    return weights, starts.round(3), ends.round(3)
 
 
 def align_audio(audio_path: str, text: str) -> dict:
@@ -252,8 +345,17 @@ def align_audio(audio_path: str, text: str) -> dict:
     Returns:
         Dict containing word and phoneme level alignments
     """
-    word_ts = get_word_timestamps(audio_path, text)
-    phoneme_ts = get_phoneme_timestamps_with_text(audio_path, text)
+    # Decode, tokenize and align once; the phoneme pass reuses all three
+    waveform, sample_rate = load_audio(audio_path)
+    words = text.upper().split()
+    word_ts = get_word_timestamps(
+        audio_path, text, waveform=waveform, sample_rate=sample_rate,
+        words=words
+    )
+    phoneme_ts = get_phoneme_timestamps_with_text(
+        audio_path, text,
+        waveform=waveform, sample_rate=sample_rate, word_timestamps=word_ts
+    )
     
     return {
         'word_timestamps': word_ts,
@@ -5,15 +5,26 @@ Common utilities used across alignment modules.
 """
 
 import logging
-from typing import Tuple, List, Dict
+import os
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Tuple, List, Dict, Mapping, NamedTuple, Optional, Sequence
 from dataclasses import dataclass
+import numpy as np
 import torch
 import torchaudio
 
+# Re-exported: the alignment package's public API includes it
+from nlp_core.text_normalize import normalize_transcript  # noqa: F401
+
 logger = logging.getLogger(__name__)
 
+# Resample transforms keyed on (orig_freq, new_freq); building one
+# recomputes its filter kernel, so they are reused across files.
+_resamplers: Dict[Tuple[int, int], torchaudio.transforms.Resample] = {}
 
-@dataclass
+
+@dataclass(slots=True, frozen=True)
 class AlignedToken:
     """Represents an aligned token with timestamps."""
     token: str
@@ -22,6 +33,120 @@ class AlignedToken:
     score: float = 1.0
 
 
+class AlignedTokenArrays(NamedTuple):
+    """
+    Aligned tokens stored as parallel arrays.
+    
+    Token i is `tokens[i]` spanning `[starts[i], ends[i])` seconds with
+    confidence `scores[i]`. Unpacks as (tokens, starts, ends, scores).
+    """
+    tokens: List[str]
+    starts: np.ndarray
+    ends: np.ndarray
+    scores: np.ndarray
+    
+    @classmethod
+    def empty(cls) -> 'AlignedTokenArrays':
+        """Return an instance with no tokens."""
+        return cls([], np.empty(0), np.empty(0), np.empty(0))
+    
+    def to_tokens(self) -> List[AlignedToken]:
+        """Convert to a list of AlignedToken objects."""
+        return [
+            AlignedToken(token=token, start=start, end=end, score=score)
+            for token, start, end, score in zip(
+                self.tokens,
+                self.starts.tolist(),
+                self.ends.tolist(),
+                self.scores.tolist()
+            )
+        ]
+
+
+@dataclass
+class CharSegments:
+    """
+    Detected CTC character runs stored as parallel arrays.
+    
+    Entry i is the run of `chars[i]` spanning frames
+    `[start[i], end[i])` with log-probability `prob[i]`.
+    """
+    chars: np.ndarray
+    start: np.ndarray
+    end: np.ndarray
+    prob: np.ndarray
+    
+    def __len__(self) -> int:
+        return len(self.chars)
+
+
+@dataclass
+class AlignedPhonemes:
+    """
+    Phoneme timestamps stored as parallel arrays.
+    
+    Entry i is `phonemes[i]` spanning `[starts[i], ends[i]]` seconds.
+    Word-based aligners fill words/positions/confidences; the weighted
+    distribution fills weights. Indexing and iteration yield the same
+    dicts as the list-returning API.
+    """
+    phonemes: List[str]
+    starts: np.ndarray
+    ends: np.ndarray
+    words: Optional[List[str]] = None
+    positions: Optional[Sequence[str]] = None
+    confidences: Optional[np.ndarray] = None
+    weights: Optional[np.ndarray] = None
+    
+    @classmethod
+    def empty(cls) -> 'AlignedPhonemes':
+        """Return an instance with no phonemes."""
+        return cls([], np.empty(0), np.empty(0))
+    
+    def __len__(self) -> int:
+        return len(self.phonemes)
+    
+    def __getitem__(self, i: int) -> dict:
+        row = {
+            'phoneme': self.phonemes[i],
+            'start': float(self.starts[i]),
+            'end': float(self.ends[i]),
+            'index': range(len(self))[i],
+        }
+        if self.weights is not None:
+            row['weight'] = float(self.weights[i])
+        if self.words is not None:
+            row['word'] = self.words[i]
+        if self.positions is not None:
+            row['position'] = self.positions[i]
+        if self.confidences is not None:
+            row['confidence'] = float(self.confidences[i])
+        return row
+    
+    def __iter__(self):
+        return iter(self.to_list())
+    
+    def to_list(self) -> List[dict]:
+        """Materialize as a list of phoneme timestamp dicts."""
+        columns = {
+            'phoneme': self.phonemes,
+            'start': self.starts.tolist(),
+            'end': self.ends.tolist(),
+            'index': range(len(self)),
+        }
+        if self.weights is not None:
+            columns['weight'] = self.weights.tolist()
+        if self.words is not None:
+            columns['word'] = self.words
+        if self.positions is not None:
+            columns['position'] = self.positions
+        if self.confidences is not None:
+            columns['confidence'] = self.confidences.tolist()
+        
+        keys = list(columns)
+        return [dict(zip(keys, row)) for row in zip(*columns.values())]
+
+
 def load_audio(
     audio_path: str, 
     target_sample_rate: int = 16000
@@ -29,6 +154,10 @@ def load_audio(
     """
     Load and preprocess audio file for alignment.
     
+    Recently loaded files are cached, keyed on the file's path, mtime and
+    size, so a rewritten file is decoded again. The returned tensor is
+    shared between callers and must not be modified in place.
+    
     Args:
         audio_path: Path to audio file
         target_sample_rate: Target sample rate (16kHz for wav2vec2)
@@ -36,86 +165,186 @@ def load_audio(
     Returns:
         Tuple of (waveform tensor, sample rate)
     """
+    stat = os.stat(audio_path)
+    return _load_audio_cached(
+        os.fspath(audio_path), stat.st_mtime_ns, stat.st_size, target_sample_rate
+    )
+
+
+@lru_cache(maxsize=32)
+def _load_audio_cached(
+    audio_path: str,
+    mtime_ns: int,
+    size: int,
+    target_sample_rate: int
+) -> Tuple[torch.Tensor, int]:
+    """Decode, downmix and resample; the file version is part of the key."""
     waveform, sample_rate = torchaudio.load(audio_path)
     
     # Convert to mono if stereo
     if waveform.shape[0] > 1:
-        waveform = torch.mean(waveform, dim=0, keepdim=True)
+        waveform = waveform.mean(dim=0, keepdim=True)
+    
+    # No-op for torchaudio's default float32 output; only casts odd dtypes
+    waveform = waveform.to(torch.float32)
     
     # Resample if needed
     if sample_rate != target_sample_rate:
-        resampler = torchaudio.transforms.Resample(
-            orig_freq=sample_rate,
-            new_freq=target_sample_rate
-        )
-        waveform = resampler(waveform)
+        waveform = get_resampler(sample_rate, target_sample_rate)(waveform)
         sample_rate = target_sample_rate
     
     return waveform, sample_rate
 
 
+def get_audio_duration(audio_path: str) -> float:
+    """
+    Get an audio file's duration in seconds from its header.
+    
+    Reads metadata only; no samples are decoded or resampled. Cached
+    like load_audio.
+    
+    Args:
+        audio_path: Path to audio file
+    
+    Returns:
+        Duration in seconds
+    """
+    stat = os.stat(audio_path)
+    return _audio_duration_cached(
+        os.fspath(audio_path), stat.st_mtime_ns, stat.st_size
+    )
+
+
+@lru_cache(maxsize=256)
+def _audio_duration_cached(audio_path: str, mtime_ns: int, size: int) -> float:
+    """Read the duration from the file header; the file version is part of the key."""
+    info = torchaudio.info(audio_path)
+    return info.num_frames / info.sample_rate
+
+
+def get_resampler(orig_freq: int, new_freq: int) -> torchaudio.transforms.Resample:
+    """
+    Get a cached resample transform between two sample rates.
+    
+    Args:
+        orig_freq: Source sample rate
+        new_freq: Target sample rate
+    
+    Returns:
+        Resample transform
+    """
+    key = (orig_freq, new_freq)
+    if key not in _resamplers:
+        _resamplers[key] = torchaudio.transforms.Resample(
+            orig_freq=orig_freq,
+            new_freq=new_freq
+        )
+    return _resamplers[key]
+
+
+# Shortest duration fix_overlapping_timestamps leaves an entry with (10ms)
+MIN_TIMESTAMP_DURATION = 0.01
+
+@lru_cache(maxsize=256)
 def strip_stress(phoneme: str) -> str:
     """Remove stress markers from ARPAbet phoneme (e.g., 'AH0' -> 'AH')."""
-    return ''.join(c for c in phoneme if not c.isdigit())
+    # ARPAbet stress is a single trailing 0/1/2 on vowels; consonants
+    # carry none and are returned as-is
+    if phoneme and phoneme[-1] in '012':
+        return phoneme[:-1]
+    return phoneme
 
 
-def get_phoneme_duration_weights() -> Dict[str, float]:
+# Relative phoneme duration weights, keyed by stress-free ARPAbet phoneme
+_PHONEME_WEIGHTS: Mapping[str, float] = MappingProxyType({
+    # Short consonants (stops, affricates)
+    'P': 0.4, 'B': 0.4, 'T': 0.4, 'D': 0.4, 'K': 0.4, 'G': 0.4,
+    'CH': 0.5, 'JH': 0.5,
+    
+    # Fricatives
+    'F': 0.6, 'V': 0.6, 'TH': 0.7, 'DH': 0.7,
+    'S': 0.6, 'Z': 0.6, 'SH': 0.7, 'ZH': 0.7,
+    'HH': 0.5,
+    
+    # Nasals and liquids
+    'M': 0.7, 'N': 0.7, 'NG': 0.7,
+    'L': 0.8, 'R': 0.8,
+    
+    # Glides
+    'W': 0.6, 'Y': 0.6,
+    
+    # Short vowels
+    'IH': 0.8, 'EH': 0.8, 'AE': 0.9, 'AH': 0.8, 'UH': 0.8,
+    
+    # Long vowels
+    'IY': 1.0, 'EY': 1.0, 'AA': 1.0, 'AO': 1.0, 'OW': 1.0, 'UW': 1.0,
+    'ER': 1.0,
+    
+    # Diphthongs (longest)
+    'AY': 1.2, 'AW': 1.2, 'OY': 1.2,
+})
+
+
+# Integer ids into _PHONEME_WEIGHT_ARR; id 0 is unknown phonemes (weight 1.0)
+_PHONEME_TO_ID: Dict[str, int] = {
+    phoneme: i for i, phoneme in enumerate(_PHONEME_WEIGHTS, start=1)
+}
+_PHONEME_WEIGHT_ARR = np.array([1.0, *_PHONEME_WEIGHTS.values()], dtype=np.float64)
+
+
+def get_phoneme_weight_array(phonemes: List[str]) -> np.ndarray:
+    """
+    Look up duration weights for a phoneme sequence as a float64 array.
+    
+    Stress markers are ignored; unknown phonemes get weight 1.0.
+    """
+    ids = np.fromiter(
+        (_PHONEME_TO_ID.get(strip_stress(p), 0) for p in phonemes),
+        dtype=np.int32,
+        count=len(phonemes)
+    )
+    return _PHONEME_WEIGHT_ARR[ids]
+
+
+def get_phoneme_duration_weights() -> Mapping[str, float]:
     """
     Get relative duration weights for phonemes.
     
     Vowels and diphthongs are typically longer than consonants.
     Stops (P, B, T, D, K, G) are typically shortest.
+    
+    Returns a shared read-only mapping built once at import.
     """
-    return {
-        # Short consonants (stops, affricates)
-        'P': 0.4, 'B': 0.4, 'T': 0.4, 'D': 0.4, 'K': 0.4, 'G': 0.4,
-        'CH': 0.5, 'JH': 0.5,
-        
-        # Fricatives
-        'F': 0.6, 'V': 0.6, 'TH': 0.7, 'DH': 0.7,
-        'S': 0.6, 'Z': 0.6, 'SH': 0.7, 'ZH': 0.7,
-        'HH': 0.5,
-        
-        # Nasals and liquids
-        'M': 0.7, 'N': 0.7, 'NG': 0.7,
-        'L': 0.8, 'R': 0.8,
-        
-        # Glides
-        'W': 0.6, 'Y': 0.6,
-        
-        # Short vowels
-        'IH': 0.8, 'EH': 0.8, 'AE': 0.9, 'AH': 0.8, 'UH': 0.8,
-        
-        # Long vowels
-        'IY': 1.0, 'EY': 1.0, 'AA': 1.0, 'AO': 1.0, 'OW': 1.0, 'UW': 1.0,
-        'ER': 1.0,
-        
-        # Diphthongs (longest)
-        'AY': 1.2, 'AW': 1.2, 'OY': 1.2,
-    }
+    return _PHONEME_WEIGHTS
 
 
 def fix_overlapping_timestamps(timestamps: List[dict]) -> List[dict]:
     """
     Fix any overlapping or out-of-order timestamps.
     
-    Ensures monotonically increasing sequence.
+    Ensures monotonically increasing sequence: each entry starts no
+    earlier than the previous end and lasts at least MIN_TIMESTAMP_DURATION.
     """
     if not timestamps:
         return timestamps
     
-    fixed = []
-    prev_end = 0.0
+    starts = np.array([ts['start'] for ts in timestamps], dtype=np.float64)
+    ends = np.array([ts['end'] for ts in timestamps], dtype=np.float64)
     
-    for ts in timestamps:
-        start = max(ts['start'], prev_end)
-        end = max(ts['end'], start + 0.01)  # Minimum 10ms duration
-        
-        fixed.append({
-            **ts,
-            'start': round(start, 3),
-            'end': round(end, 3)
-        })
-        prev_end = end
-    
-    return fixed
+    # Sequentially, end[i] = max(end[i], start[i] + d, end[i-1] + d) with
+    # end[-1] = 0, which unrolls to a running max shifted by d per step
+    step = MIN_TIMESTAMP_DURATION * np.arange(len(timestamps))
+    ends = np.maximum(ends, starts + MIN_TIMESTAMP_DURATION)
+    ends = step + np.maximum(
+        MIN_TIMESTAMP_DURATION, np.maximum.accumulate(ends - step)
+    )
+    starts = np.maximum(starts, np.concatenate(([0.0], ends[:-1])))
+    
+    return [
+        {**ts, 'start': start, 'end': end}
+        for ts, start, end in zip(
+            timestamps,
+            np.round(starts, 3).tolist(),
+            np.round(ends, 3).tolist()
+        )
+    ]
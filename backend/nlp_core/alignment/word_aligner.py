@@ -5,111 +5,211 @@ Extracts word boundaries from audio using forced alignment.
 """
 
 import logging
-from typing import List
+from typing import List, Optional
+import numpy as np
+import torch
 
-from .utils import load_audio, fix_overlapping_timestamps
-from .ctc_aligner import perform_ctc_forced_alignment
+from .utils import (
+    load_audio,
+    get_audio_duration,
+    fix_overlapping_timestamps,
+    AlignedTokenArrays
+)
+from .ctc_aligner import (
+    perform_ctc_forced_alignment_arrays,
+    perform_ctc_forced_alignment_batch_arrays
+)
 
 logger = logging.getLogger(__name__)
 
+# Tokens that mark word boundaries rather than characters
+_SEPARATOR_TOKENS = ['|', ' ', '']
 
-def get_word_timestamps(audio_path: str, text: str) -> List[dict]:
+
+def get_word_timestamps(
+    audio_path: str,
+    text: str,
+    transcript_clean: Optional[str] = None,
+    waveform: Optional[torch.Tensor] = None,
+    sample_rate: int = 16000,
+    words: Optional[List[str]] = None
+) -> List[dict]:
     """
     Get word-level timestamps using forced alignment.
     
     Args:
         audio_path: Path to audio file
         text: Text transcript
+        transcript_clean: Precomputed normalized transcript, if known
+        waveform: Already loaded mono waveform [1, T]; skips reading audio_path
+        sample_rate: Sample rate of waveform
+        words: Precomputed text.upper().split(), if known
     
     Returns:
         List of word timestamps:
         [{"word": "SHE", "start": 0.0, "end": 0.35, "confidence": 0.9}, ...]
     """
     # Load audio
-    waveform, sample_rate = load_audio(audio_path)
+    if waveform is None:
+        waveform, sample_rate = load_audio(audio_path)
     
     # Get character-level alignment
-    char_alignments = perform_ctc_forced_alignment(waveform, text, sample_rate)
+    char_alignments = perform_ctc_forced_alignment_arrays(
+        waveform, text, sample_rate, transcript_clean=transcript_clean
+    )
+    
+    if words is None:
+        words = text.upper().split()
     
-    if not char_alignments:
+    if not char_alignments.tokens:
         logger.warning("No character alignments found, using fallback")
-        return _fallback_word_timestamps(audio_path, text)
+        return _fallback_word_timestamps(
+            audio_path, text, duration=waveform.shape[1] / sample_rate,
+            words=words
+        )
+    
+    return _group_chars_into_words(char_alignments, text, words=words)
+
+
+def get_word_timestamps_batch(
+    audio_paths: List[str],
+    texts: List[str],
+    transcripts_clean: Optional[List[Optional[str]]] = None,
+    waveforms: Optional[List[torch.Tensor]] = None,
+    sample_rate: int = 16000
+) -> List[List[dict]]:
+    """
+    Get word-level timestamps for several audio files at once.
+    
+    Runs a single batched forward pass of the alignment model.
+    Raises if the batched forward pass fails; align items one by one then.
+    
+    Args:
+        audio_paths: Paths to audio files
+        texts: Text transcripts, one per audio file
+        transcripts_clean: Precomputed normalized transcripts, if known
+        waveforms: Already loaded mono waveforms; skips reading audio_paths
+        sample_rate: Sample rate of waveforms
+    
+    Returns:
+        List of word timestamp lists, one per audio file
+    """
+    if waveforms is None:
+        waveforms = []
+        for audio_path in audio_paths:
+            waveform, sample_rate = load_audio(audio_path)
+            waveforms.append(waveform)
     
+    batch_alignments = perform_ctc_forced_alignment_batch_arrays(
+        waveforms, texts, sample_rate, transcripts_clean=transcripts_clean
+    )
+    
+    results = []
+    for audio_path, text, waveform, char_alignments in zip(
+        audio_paths, texts, waveforms, batch_alignments
+    ):
+        if not char_alignments.tokens:
+            logger.warning("No character alignments found, using fallback")
+            results.append(_fallback_word_timestamps(
+                audio_path, text, duration=waveform.shape[1] / sample_rate
+            ))
+        else:
+            results.append(_group_chars_into_words(char_alignments, text))
+    
+    return results
+
+
+def _group_chars_into_words(
+    char_alignments: AlignedTokenArrays,
+    text: str,
+    words: Optional[List[str]] = None
+) -> List[dict]:
+    """
+    Group character-level alignments into word timestamps.
+    
+    Separator tokens are dropped, then each word takes the next
+    len(word) characters: word i spans characters
+    [offsets[i], offsets[i + 1]) of the cumulative word lengths. A word
+    cut short by the end of the alignment keeps the characters it got.
+    
+    `words` is text.upper().split(), computed here if not given.
+    """
     # Group characters into words
-    words = text.upper().split()
-    word_timestamps = []
-    char_idx = 0
-    
-    for word in words:
-        word_chars = list(word)
-        
-        if char_idx >= len(char_alignments):
-            break
-        
-        # Skip spaces/separators
-        while char_idx < len(char_alignments):
-            if char_alignments[char_idx].token in ['|', ' ', '']:
-                char_idx += 1
-            else:
-                break
-        
-        if char_idx >= len(char_alignments):
-            break
-        
-        word_start = char_alignments[char_idx].start
-        word_end = word_start
-        word_score = 0.0
-        matched_chars = 0
-        
-        # Match characters in word
-        for expected_char in word_chars:
-            if char_idx < len(char_alignments):
-                aligned = char_alignments[char_idx]
-                word_end = aligned.end
-                word_score += aligned.score
-                matched_chars += 1
-                char_idx += 1
-        
-        avg_score = word_score / matched_chars if matched_chars > 0 else 0.5
-        
-        word_timestamps.append({
+    if words is None:
+        words = text.upper().split()
+    
+    # Skip spaces/separators
+    keep = ~np.isin(np.asarray(char_alignments.tokens), _SEPARATOR_TOKENS)
+    starts = char_alignments.starts[keep]
+    ends = char_alignments.ends[keep]
+    scores = char_alignments.scores[keep]
+    num_chars = len(starts)
+    
+    offsets = np.concatenate(([0], np.cumsum([len(word) for word in words])))
+    
+    # Words that start before the characters run out
+    num_words = int(np.searchsorted(offsets[:-1], num_chars, side='left'))
+    first = offsets[:num_words]
+    last = np.minimum(offsets[1:num_words + 1], num_chars)
+    
+    cum_scores = np.concatenate(([0.0], np.cumsum(scores)))
+    avg_scores = (cum_scores[last] - cum_scores[first]) / (last - first)
+    
+    word_timestamps = [
+        {
             'word': word,
-            'start': round(word_start, 3),
-            'end': round(word_end, 3),
-            'confidence': round(avg_score, 3)
-        })
+            'start': start,
+            'end': end,
+            'confidence': confidence
+        }
+        for word, start, end, confidence in zip(
+            words[:num_words],
+            np.round(starts[first], 3).tolist(),
+            np.round(ends[last - 1], 3).tolist(),
+            np.round(avg_scores, 3).tolist()
+        )
+    ]
     
     # Fix overlapping timestamps
     word_timestamps = fix_overlapping_timestamps(word_timestamps)
     
-    logger.debug(f"Aligned {len(word_timestamps)} words from audio")
+    logger.debug("Aligned %d words from audio", len(word_timestamps))
     return word_timestamps
 
 
-def _fallback_word_timestamps(audio_path: str, text: str) -> List[dict]:
+def _fallback_word_timestamps(
+    audio_path: str,
+    text: str,
+    duration: Optional[float] = None,
+    words: Optional[List[str]] = None
+) -> List[dict]:
     """
     Fallback word timestamp estimation when alignment fails.
-    """
-    import librosa
     
-    try:
-        y, sr = librosa.load(audio_path, sr=16000)
-        duration = len(y) / sr
-    except Exception:
-        duration = 2.0
+    `words` is text.upper().split(), computed here if not given.
+    """
+    if duration is None:
+        try:
+            duration = get_audio_duration(audio_path)
+        except Exception:
+            duration = 2.0
     
-    words = text.upper().split()
+    if words is None:
+        words = text.upper().split()
     if not words:
         return []
     
     word_duration = duration / len(words)
     
+    # Word i spans [edges[i], edges[i + 1])
+    edges = np.round(np.arange(len(words) + 1) * word_duration, 3).tolist()
+    
     return [
         {
             'word': word,
-            'start': round(i * word_duration, 3),
-            'end': round((i + 1) * word_duration, 3),
+            'start': start,
+            'end': end,
             'confidence': 0.3
         }
-        for i, word in enumerate(words)
+        for word, start, end in zip(words, edges[:-1], edges[1:])
     ]
@@ -13,6 +13,8 @@ from difflib import SequenceMatcher
 import torch
 import torchaudio
 
+from nlp_core.alignment.utils import get_resampler
+
 logger = logging.getLogger(__name__)
 
 # Singleton instances
@@ -51,14 +53,13 @@ def transcribe_audio(audio_path: str) -> str:
         # Load audio
         waveform, sr = torchaudio.load(audio_path)
         
+        # Convert to mono before resampling so only one channel is resampled
+        if waveform.shape[0] > 1:
+            waveform = waveform.mean(dim=0, keepdim=True)
+        
         # Resample to 16kHz if needed
         if sr != 16000:
-            resampler = torchaudio.transforms.Resample(sr, 16000)
-            waveform = resampler(waveform)
-        
-        # Convert to mono
-        if waveform.shape[0] > 1:
-            waveform = torch.mean(waveform, dim=0, keepdim=True)
+            waveform = get_resampler(sr, 16000)(waveform)
         
         # Process through model
         inputs = processor(
@@ -6,32 +6,47 @@ Reference: Adapted from Pronunex_initial_setup/src/slice_audio.py
 """
 
 import logging
-from typing import List
+import os
+from typing import List, Optional, Union
 import numpy as np
 import librosa
+import torch
 from django.conf import settings
 
 logger = logging.getLogger(__name__)
 
 
-def slice_audio_by_timestamps(audio_path: str, timestamps: List[dict]) -> List[np.ndarray]:
+def slice_audio_by_timestamps(
+    audio: Union[str, os.PathLike, np.ndarray, torch.Tensor],
+    timestamps: List[dict],
+    sample_rate: Optional[int] = None
+) -> List[np.ndarray]:
     """
     Slice audio into segments based on phoneme timestamps.
     
     Args:
-        audio_path: Path to cleaned audio file
+        audio: Path to cleaned audio file, or an already loaded mono
+               waveform (numpy array or [1, T] tensor)
         timestamps: List of phoneme timestamps from aligner
                    [{"phoneme": "S", "start": 0.1, "end": 0.25}, ...]
+        sample_rate: Sample rate of an in-memory waveform
+                     (defaults to SCORING_CONFIG['SAMPLE_RATE'])
     
     Returns:
-        List of numpy arrays, each containing audio for one phoneme
+        List of numpy arrays, each containing audio for one phoneme.
+        For in-memory input these are views into the waveform.
     """
-    config = settings.SCORING_CONFIG
-    sample_rate = config.get('SAMPLE_RATE', 16000)
+    if sample_rate is None:
+        config = settings.SCORING_CONFIG
+        sample_rate = config.get('SAMPLE_RATE', 16000)
     
     try:
-        # Load audio
-        y, sr = librosa.load(audio_path, sr=sample_rate)
+        if isinstance(audio, (str, os.PathLike)):
+            # Load audio
+            y, sr = librosa.load(audio, sr=sample_rate)
+        else:
+            y = audio if isinstance(audio, np.ndarray) else audio.detach().cpu().numpy()
+            y = y.reshape(-1)
         
         slices = []
         
@@ -0,0 +1,97 @@
+"""
+Embedding Storage Format for Pronunex.
+
+Packs phoneme embedding matrices into the binary blobs stored in
+ReferenceSentence.reference_embeddings, and reads every format that has
+been written there. Needs only numpy and zstandard, not torch.
+"""
+
+import pickle
+import struct
+import threading
+from typing import List
+import numpy as np
+import zstandard
+
+# Embedding blob layout: magic + (N, D) uint32 header + float16 [N, D] data.
+# PXZ1 blobs hold the float16 data zstd-compressed; PXE1 blobs hold it raw.
+EMBEDDINGS_MAGIC = b'PXZ1'
+EMBEDDINGS_MAGIC_RAW = b'PXE1'
+_EMBEDDINGS_HEADER = struct.Struct('<II')
+EMBEDDINGS_ZSTD_LEVEL = 3
+
+# zstd contexts are reusable but not thread-safe; keep one per thread
+_zstd_local = threading.local()
+
+
+def _zstd_compressor() -> zstandard.ZstdCompressor:
+    """Get this thread's zstd compressor."""
+    if not hasattr(_zstd_local, 'compressor'):
+        _zstd_local.compressor = zstandard.ZstdCompressor(level=EMBEDDINGS_ZSTD_LEVEL)
+    return _zstd_local.compressor
+
+
+def _zstd_decompressor() -> zstandard.ZstdDecompressor:
+    """Get this thread's zstd decompressor."""
+    if not hasattr(_zstd_local, 'decompressor'):
+        _zstd_local.decompressor = zstandard.ZstdDecompressor()
+    return _zstd_local.decompressor
+
+
+def pack_embeddings(embeddings: List[np.ndarray]) -> bytes:
+    """
+    Pack embeddings into a compact binary blob for database storage.
+    
+    The vectors are stacked into one contiguous [N, D] float16 array;
+    half precision is plenty for cosine scoring and halves the blob size.
+    The float16 data is then zstd-compressed, since neighbouring phoneme
+    vectors are strongly correlated.
+    
+    Args:
+        embeddings: List of D-dimensional numpy arrays
+    
+    Returns:
+        bytes: Magic prefix, (N, D) header and compressed float16 data
+    """
+    arr = np.stack([np.asarray(e) for e in embeddings]).astype(np.float16)
+    n, d = arr.shape
+    payload = _zstd_compressor().compress(arr.tobytes())
+    return EMBEDDINGS_MAGIC + _EMBEDDINGS_HEADER.pack(n, d) + payload
+
+
+def unpack_embeddings(data: bytes) -> np.ndarray:
+    """
+    Unpack embeddings stored by pack_embeddings.
+    
+    Uncompressed PXE1 blobs are returned as a zero-copy view. Blobs
+    written before the binary format (pickled lists, starting with
+    b'\\x80') are still accepted.
+    
+    Args:
+        data: Binary blob from the database (bytes or memoryview)
+    
+    Returns:
+        np.ndarray: Embedding matrix of shape [N, D]
+    """
+    buf = memoryview(data)
+    magic_len = len(EMBEDDINGS_MAGIC)
+    magic = bytes(buf[:magic_len])
+    
+    if magic not in (EMBEDDINGS_MAGIC, EMBEDDINGS_MAGIC_RAW):
+        # Legacy pickle format
+        embeddings = pickle.loads(buf)
+        return np.stack([
+            e.numpy() if hasattr(e, 'numpy') else np.asarray(e)
+            for e in embeddings
+        ])
+    
+    n, d = _EMBEDDINGS_HEADER.unpack_from(buf, magic_len)
+    offset = magic_len + _EMBEDDINGS_HEADER.size
+    
+    if magic == EMBEDDINGS_MAGIC:
+        buf = _zstd_decompressor().decompress(
+            buf[offset:], max_output_size=n * d * 2
+        )
+        offset = 0
+    
+    return np.frombuffer(buf, dtype=np.float16, count=n * d, offset=offset).reshape(n, d)
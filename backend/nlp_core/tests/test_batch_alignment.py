@@ -0,0 +1,79 @@
+"""
+Batched vs single-item CTC forced alignment.
+
+The batched path pads waveforms to a common length, so its emissions and
+alignments must match what each clip gets when aligned on its own.
+
+Run with: python -m unittest nlp_core.tests.test_batch_alignment
+"""
+
+import importlib.util
+import unittest
+
+HAS_TORCH = importlib.util.find_spec('torch') is not None
+
+if HAS_TORCH:
+    import torch
+
+    from nlp_core.alignment.ctc_aligner import (
+        _mms_batch_emissions,
+        perform_ctc_forced_alignment_arrays,
+        perform_ctc_forced_alignment_batch_arrays
+    )
+    from nlp_core.alignment.models import (
+        alignment_autocast,
+        get_alignment_device,
+        get_forced_alignment_model
+    )
+
+
+@unittest.skipUnless(HAS_TORCH, 'alignment package needs torch')
+class BatchAlignmentTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        try:
+            bundle, cls.model, _ = get_forced_alignment_model()
+        except Exception as e:
+            raise unittest.SkipTest(f'alignment model unavailable: {e}')
+        if bundle is None:
+            raise unittest.SkipTest('MMS_FA unavailable, batching not used')
+
+        # Two clips of different lengths so one of them is padded
+        generator = torch.Generator().manual_seed(0)
+        cls.waveforms = [
+            torch.randn(1, 16000 * 2, generator=generator) * 0.1,
+            torch.randn(1, 16000 * 3 + 1234, generator=generator) * 0.1,
+        ]
+        cls.transcripts = ['the cat sat', 'a quick brown fox jumps']
+
+    def test_emissions_match_single(self):
+        device, dtype = get_alignment_device()
+        with torch.inference_mode():
+            emissions, lengths = _mms_batch_emissions(self.model, self.waveforms)
+            for i, waveform in enumerate(self.waveforms):
+                with alignment_autocast():
+                    single, _ = self.model(waveform.to(device, dtype))
+                single = single.float()
+
+                num_frames = int(lengths[i])
+                self.assertEqual(num_frames, single.shape[1])
+                torch.testing.assert_close(
+                    emissions[i, :num_frames], single[0], atol=1e-3, rtol=1e-3
+                )
+
+    def test_alignments_match_single(self):
+        batched = perform_ctc_forced_alignment_batch_arrays(
+            self.waveforms, self.transcripts
+        )
+        for waveform, transcript, result in zip(
+            self.waveforms, self.transcripts, batched
+        ):
+            single = perform_ctc_forced_alignment_arrays(waveform, transcript)
+            self.assertEqual(result.tokens, single.tokens)
+            self.assertEqual(list(result.starts), list(single.starts))
+            self.assertEqual(list(result.ends), list(single.ends))
+
+
+if __name__ == '__main__':
+    unittest.main()
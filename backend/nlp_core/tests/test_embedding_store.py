@@ -0,0 +1,69 @@
+"""
+Round-trip tests for the stored embedding blob formats.
+
+Every format ever written to reference_embeddings must stay readable:
+zstd-compressed PXZ1, raw PXE1 and the legacy pickled list.
+
+Run with: python -m unittest nlp_core.tests.test_embedding_store
+"""
+
+import pickle
+import unittest
+import numpy as np
+
+from nlp_core.embedding_store import (
+    EMBEDDINGS_MAGIC,
+    EMBEDDINGS_MAGIC_RAW,
+    _EMBEDDINGS_HEADER,
+    pack_embeddings,
+    unpack_embeddings
+)
+
+
+class EmbeddingStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.embeddings = [
+            rng.standard_normal(768).astype(np.float32) for _ in range(5)
+        ]
+        self.expected = np.stack(self.embeddings).astype(np.float16)
+
+    def test_compressed_round_trip(self):
+        blob = pack_embeddings(self.embeddings)
+        self.assertTrue(blob.startswith(EMBEDDINGS_MAGIC))
+
+        result = unpack_embeddings(blob)
+        self.assertEqual(result.dtype, np.float16)
+        np.testing.assert_array_equal(result, self.expected)
+
+    def test_raw_blob(self):
+        n, d = self.expected.shape
+        blob = (
+            EMBEDDINGS_MAGIC_RAW + _EMBEDDINGS_HEADER.pack(n, d)
+            + self.expected.tobytes()
+        )
+        np.testing.assert_array_equal(unpack_embeddings(blob), self.expected)
+
+    def test_legacy_pickle(self):
+        blob = pickle.dumps(self.embeddings)
+        result = unpack_embeddings(blob)
+        np.testing.assert_array_equal(result, np.stack(self.embeddings))
+
+    def test_memoryview_input(self):
+        n, d = self.expected.shape
+        blobs = [
+            pack_embeddings(self.embeddings),
+            EMBEDDINGS_MAGIC_RAW + _EMBEDDINGS_HEADER.pack(n, d)
+            + self.expected.tobytes(),
+        ]
+        for blob in blobs:
+            result = unpack_embeddings(memoryview(blob))
+            np.testing.assert_array_equal(result, self.expected)
+
+        legacy = unpack_embeddings(memoryview(pickle.dumps(self.embeddings)))
+        np.testing.assert_array_equal(legacy, np.stack(self.embeddings))
+
+
+if __name__ == '__main__':
+    unittest.main()
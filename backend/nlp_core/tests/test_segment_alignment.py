@@ -0,0 +1,103 @@
+"""
+Tests for matching wav2vec2 character segments to the transcript.
+
+Covers the DP in _align_segments_to_transcript: which segment each
+character is assigned to, tie-breaking on segment confidence, and the
+interpolated bounds of characters left unmatched.
+
+Run with: python -m unittest nlp_core.tests.test_segment_alignment
+"""
+
+import importlib.util
+import unittest
+import numpy as np
+
+HAS_TORCH = importlib.util.find_spec('torch') is not None
+
+# 20 ms per frame, as for wav2vec2 at 16 kHz
+FRAME = 0.02
+
+
+def _segments(chars, start, end, prob=None):
+    from nlp_core.alignment.utils import CharSegments
+
+    if prob is None:
+        # Matched characters score 0.5 + prob = 0.4, unmatched ones 0.5
+        prob = [-0.1] * len(chars)
+    return CharSegments(
+        chars=np.array(chars),
+        start=np.array(start),
+        end=np.array(end),
+        prob=np.array(prob, dtype=float)
+    )
+
+
+@unittest.skipUnless(HAS_TORCH, 'alignment package needs torch')
+class AlignSegmentsToTranscriptTest(unittest.TestCase):
+
+    def align(self, segments, transcript):
+        from nlp_core.alignment.ctc_aligner import _align_segments_to_transcript
+
+        return _align_segments_to_transcript(segments, list(transcript), FRAME)
+
+    def assertBounds(self, result, starts, ends):
+        np.testing.assert_allclose(result.starts, starts)
+        np.testing.assert_allclose(result.ends, ends)
+
+    def test_all_matched(self):
+        result = self.align(_segments(['C', 'A', 'T'], [0, 5, 10], [5, 10, 15]), 'cat')
+
+        self.assertEqual(result.tokens, ['c', 'a', 't'])
+        self.assertBounds(result, [0.0, 0.1, 0.2], [0.1, 0.2, 0.3])
+        np.testing.assert_allclose(result.scores, [0.4, 0.4, 0.4])
+
+    def test_missing_character_fills_gap_between_neighbours(self):
+        result = self.align(_segments(['C', 'T'], [0, 10], [5, 15]), 'cat')
+
+        # 'a' has no segment: it spans the gap between 'c' and 't'
+        self.assertBounds(result, [0.0, 0.1, 0.2], [0.1, 0.2, 0.3])
+        np.testing.assert_allclose(result.scores, [0.4, 0.5, 0.4])
+
+    def test_missing_characters_split_gap_evenly(self):
+        result = self.align(_segments(['S', 'T'], [0, 20], [5, 25]), 'sxyt')
+
+        self.assertBounds(result, [0.0, 0.1, 0.25, 0.4], [0.1, 0.25, 0.4, 0.5])
+        np.testing.assert_allclose(result.scores, [0.4, 0.5, 0.5, 0.4])
+
+    def test_missing_edge_characters_use_audio_bounds(self):
+        result = self.align(_segments(['A', 'Z'], [10, 20], [15, 25]), 'xa')
+
+        # Leading 'x' runs from 0 up to 'a'; trailing segments are ignored
+        self.assertBounds(result, [0.0, 0.2], [0.2, 0.3])
+        np.testing.assert_allclose(result.scores, [0.5, 0.4])
+
+    def test_extra_segments_are_skipped(self):
+        result = self.align(
+            _segments(['A', 'X', 'B', 'Y'], [0, 5, 8, 12], [5, 8, 12, 20]), 'ab'
+        )
+
+        self.assertBounds(result, [0.0, 0.16], [0.1, 0.24])
+        np.testing.assert_allclose(result.scores, [0.4, 0.4])
+
+    def test_no_matches_spreads_over_audio(self):
+        result = self.align(_segments(['X', 'Y'], [0, 10], [10, 20]), 'ab')
+
+        self.assertBounds(result, [0.0, 0.2], [0.2, 0.4])
+        np.testing.assert_allclose(result.scores, [0.5, 0.5])
+
+    def test_tie_prefers_confident_segment(self):
+        segments = _segments(
+            ['A', 'A'], [0, 10], [5, 15], prob=[np.log(0.2), np.log(0.9)]
+        )
+        result = self.align(segments, 'a')
+
+        self.assertBounds(result, [0.2], [0.3])
+        np.testing.assert_allclose(result.scores, [0.5 + np.log(0.9)])
+
+    def test_empty_inputs(self):
+        self.assertEqual(self.align(_segments([], [], []), 'ab').tokens, [])
+        self.assertEqual(self.align(_segments(['A'], [0], [5]), '').tokens, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,26 @@
+"""
+Transcript Normalization for Pronunex.
+
+Pure-string helpers shared by the alignment pipeline and the library
+models. Kept free of torch/torchaudio so models can import it cheaply.
+"""
+
+# Deletes every ASCII character that is not a letter (spaces, digits, punctuation)
+_ASCII_NON_ALPHA = str.maketrans(
+    '', '', ''.join(chr(c) for c in range(128) if not chr(c).isalpha())
+)
+
+
+def normalize_transcript(text: str) -> str:
+    """
+    Normalize a transcript for MMS_FA alignment.
+    
+    Lowercases and keeps letters only, e.g. "Hello, world!" -> "helloworld".
+    """
+    cleaned = text.lower().translate(_ASCII_NON_ALPHA)
+    
+    if not cleaned.isascii():
+        # Non-ASCII punctuation is not covered by the translate table
+        cleaned = ''.join(c for c in cleaned if c.isalpha())
+    
+    return cleaned
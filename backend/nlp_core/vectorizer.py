@@ -13,13 +13,21 @@ The fix is to process the FULL audio and then slice the embedding TENSOR.
 
 import logging
 from typing import List, Dict, Tuple, Optional
-import pickle
 import numpy as np
 import torch
 import torchaudio
 from transformers import Wav2Vec2Model, Wav2Vec2Processor
 from django.conf import settings
 
+from nlp_core.alignment.utils import get_resampler
+# Re-exported: callers import the blob format helpers from here
+from nlp_core.embedding_store import (  # noqa: F401
+    EMBEDDINGS_MAGIC,
+    EMBEDDINGS_MAGIC_RAW,
+    pack_embeddings,
+    unpack_embeddings
+)
+
 logger = logging.getLogger(__name__)
 
 # Singleton model for embedding generation
@@ -30,6 +38,7 @@ _embedding_model = None
 WAV2VEC2_STRIDE_SECONDS = 320 / 16000  # 0.02
 
 
+
 def get_embedding_model():
     """Get or load the Wav2Vec2 model for embeddings."""
     global _embedding_processor, _embedding_model
@@ -69,16 +78,15 @@ def compute_contextual_embeddings(audio_path: str) -> Tuple[np.ndarray, float]:
         # Load full audio
         waveform, sr = torchaudio.load(audio_path)
         
+        # Convert to mono before resampling so only one channel is resampled
+        if waveform.shape[0] > 1:
+            waveform = waveform.mean(dim=0, keepdim=True)
+        
         # Resample to 16kHz if needed
         if sr != 16000:
-            resampler = torchaudio.transforms.Resample(sr, 16000)
-            waveform = resampler(waveform)
+            waveform = get_resampler(sr, 16000)(waveform)
             sr = 16000
         
-        # Convert to mono
-        if waveform.shape[0] > 1:
-            waveform = torch.mean(waveform, dim=0, keepdim=True)
-        
         # Get full embeddings - model processes ENTIRE audio with full context
         inputs = processor(
             waveform.squeeze().numpy(),
@@ -309,22 +317,22 @@ def serialize_embeddings(embeddings: List[np.ndarray]) -> bytes:
         embeddings: List of numpy arrays
     
     Returns:
-        bytes: Pickled embeddings
+        bytes: Packed float16 embeddings (see pack_embeddings)
     """
-    return pickle.dumps(embeddings)
+    return pack_embeddings(embeddings)
 
 
-def deserialize_embeddings(data: bytes) -> List[np.ndarray]:
+def deserialize_embeddings(data: bytes) -> np.ndarray:
     """
     Deserialize embeddings from database.
     
     Args:
-        data: Pickled embeddings
+        data: Packed (or legacy pickled) embeddings
     
     Returns:
-        List of numpy arrays
+        np.ndarray: Embedding matrix of shape [N, D]
     """
-    return pickle.loads(data)
+    return unpack_embeddings(data)
 
 
 def embedding_distance(emb1: np.ndarray, emb2: np.ndarray, metric: str = 'cosine') -> float: